@@ -0,0 +1,52 @@
+"""
+Script to benchmark the enumeration methods of fast_enum against each other
+on a selected 'coordination sphere'.
+"""
+
+import time
+import argparse
+import sym_operations as sym
+import define_permutations as pr
+from fast_enum import enumerate_unique, clear_result_cache, METHODS
+from get_configurations import (coordinates_first_sphere, coordinates_second_sphere,
+                                coordinates_reduced_sphere)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Time the enumeration methods and check that they agree."
+    )
+    parser.add_argument("--sphere", type=int, default=1, choices=[1,2,3],
+                        help="Which sphere to use: 1=first, 2=second, 3=reduced (default: 1)")
+    parser.add_argument("--group", default="D4h", choices=sym.POINT_GROUPS,
+                        help="Point group of the site set (default: D4h)")
+    parser.add_argument("--ni", type=int, default=7, help="Number of I atoms (default: 7)")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS,
+                        help="Methods to benchmark (default: all)")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Number of timed runs per method, the best is reported (default: 1)")
+
+    args = parser.parse_args()
+
+    coordinates = {1: coordinates_first_sphere,
+                   2: coordinates_second_sphere,
+                   3: coordinates_reduced_sphere}[args.sphere]
+    try:
+        perms = pr.permutation_group(args.group, coordinates)
+    except ValueError as e:  # sites not symmetric under the chosen group
+        parser.error(str(e))
+    n_sites = len(coordinates)
+
+    print(f"I atoms: {args.ni} on {n_sites} sites")
+    reference = None
+    for method in args.methods:
+        best = float('inf')
+        for _ in range(args.repeat):
+            clear_result_cache()
+            start = time.time()
+            uniq_dict, n_total = enumerate_unique(n_sites, args.ni, perms,
+                                                  enum_max=float('inf'), method=method)
+            best = min(best, time.time() - start)
+        if reference is None:
+            reference = uniq_dict
+        status = "ok" if uniq_dict == reference else "MISMATCH"
+        print(f"{method:>10}: {best:8.3f} s  unique={len(uniq_dict):,}  [{status}]")
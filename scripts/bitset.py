@@ -0,0 +1,205 @@
+"""
+Fixed-width multi-word bitsets, for site sets of more than 64 sites.
+
+A configuration on N sites is stored as a row of W = ceil(N / 64) uint64 words,
+word w holding sites 64 w .. 64 w + 63 (least significant word first), and a block
+of configurations as an (n, W) array. Sorting, comparing and canonicalizing such
+blocks works like for single uint64 bitvectors, so array-backed storage and the
+vectorized kernels are not limited to 64 sites.
+
+This module provides:
+- Conversion between Python int bitvectors and rows of words.
+- The int bitvector helpers shared by the enumeration methods: the site masks of a
+  group, images under a permutation, popcount and the order of site sets.
+- Comparison, sorting and binary search of rows in the order of the corresponding ints
+  (`int_at` and `search` also accept plain uint64 arrays).
+- Tables of all the j-subsets of a range of sites, per-byte lookup tables applying
+  every permutation of a group to a whole block, and the canonical (minimum) form of
+  every key of a block, for single words and multi-word rows alike.
+"""
+
+from functools import lru_cache
+import numpy as np
+
+WORD_BITS = 64
+_WORD_MASK = (1 << WORD_BITS) - 1
+
+def n_words(N):
+    """Number of uint64 words of a configuration on N sites."""
+    return max(1, -(-N // WORD_BITS))
+
+def to_words(ints, W):
+    """
+    Converts an iterable of int bitvectors into an (n, W) uint64 array of rows.
+    """
+    ints = list(ints)
+    words = np.empty((len(ints), W), dtype=np.uint64)
+    for w in range(W):
+        words[:, w] = [(x >> (WORD_BITS * w)) & _WORD_MASK for x in ints]
+    return words
+
+def to_int(row):
+    """Converts one row of words into an int bitvector."""
+    x = 0
+    for word in reversed(row.tolist()):
+        x = (x << WORD_BITS) | word
+    return x
+
+def to_ints(words):
+    """Converts an (n, W) array of rows into a list of int bitvectors."""
+    ints = [0] * len(words)
+    for w in range(words.shape[1] - 1, -1, -1):
+        ints = [(x << WORD_BITS) | y for x, y in zip(ints, words[:, w].tolist())]
+    return ints
+
+def int_at(keys, i):
+    """The i-th key of a uint64 array or of an (n, W) array of rows, as an int."""
+    return int(keys[i]) if keys.ndim == 1 else to_int(keys[i])
+
+def lex_order(words):
+    """Stable argsort of the rows of `words` in increasing int order."""
+    # np.lexsort sorts by its last key first, i.e. by the most significant word
+    return np.lexsort(words.T)
+
+def less(a, b):
+    """Row-wise a < b (as ints) for two (n, W) arrays of rows."""
+    result = np.zeros(len(a), dtype=bool)
+    equal = np.ones(len(a), dtype=bool)
+    for w in range(a.shape[1] - 1, -1, -1):
+        result |= equal & (a[:, w] < b[:, w])
+        equal &= a[:, w] == b[:, w]
+    return result
+
+def run_starts(words):
+    """Indices of the first row of every run of equal rows, for sorted rows."""
+    return np.flatnonzero(np.r_[True, np.any(words[1:] != words[:-1], axis=1)])
+
+def search(keys, x):
+    """
+    Position of the int `x` in sorted keys (the first key >= x), for a uint64 array
+    or an (n, W) array of rows, like np.searchsorted.
+    """
+    if keys.ndim == 1:
+        if x >= 1 << WORD_BITS:
+            return len(keys)
+        return int(np.searchsorted(keys, np.uint64(x)))
+    lo, hi = 0, len(keys)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if to_int(keys[mid]) < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def site_masks(perm_tuples, N):
+    """
+    For each permutation, returns the output bit of every input site.
+
+    Parameters:
+        perm_tuples: List of permutations (tuples mapping output to input positions).
+        N:           Number of sites.
+
+    Returns:
+        List (one per permutation) of lists: masks[g][j] = 1 << i where perm[i] == j.
+    """
+    masks = []
+    for p in perm_tuples:
+        m = [0] * N
+        for i, j in enumerate(p):
+            m[j] = 1 << i
+        masks.append(m)
+    return masks
+
+def image(bitvec, m):
+    """
+    Image of a bitvector under the permutation with site masks `m`.
+    """
+    img = 0
+    while bitvec:
+        low = bitvec & -bitvec
+        img |= m[low.bit_length() - 1]
+        bitvec ^= low
+    return img
+
+def popcount(bitvec):
+    """Number of set bits (occupied sites) of a bitvector."""
+    return bin(bitvec).count('1')
+
+def is_lex_smaller(a: int, b: int) -> bool:
+    """
+    True if the site set `a` comes before `b` when both are read as sorted tuples
+    of site indices (same number of sites assumed).
+    The first differing site is the lowest bit of a ^ b; `a` is smaller if it owns it.
+    """
+    d = a ^ b
+    return bool(a & d & -d)
+
+@lru_cache(maxsize=64)
+def subsets_table(first, stop, j):
+    """
+    Returns all j-subsets of the sites first..stop-1: a uint64 array of bitvectors,
+    or an (n, W) array of rows of W = n_words(stop) words beyond 64 sites.
+
+    Built by dynamic programming over the sites (Pascal's rule), dropping the
+    partial tables that can no longer reach j sites.
+    """
+    W = n_words(stop)
+    n = stop - first
+    rows = [np.zeros((1, W), dtype=np.uint64)] + [np.zeros((0, W), dtype=np.uint64)] * j
+    for m in range(n):
+        bit = np.zeros(W, dtype=np.uint64)
+        w, r = divmod(first + m, WORD_BITS)
+        bit[w] = np.uint64(1 << r)
+        low = max(0, j - (n - m - 1))
+        for i in range(min(j, m + 1), 0, -1):
+            rows[i] = np.concatenate([rows[i], rows[i - 1] | bit])
+        for i in range(low):
+            rows[i] = np.zeros((0, W), dtype=np.uint64)
+    return rows[j][:, 0].copy() if W == 1 else rows[j]
+
+def perm_luts(perm_tuples, N):
+    """
+    Precomputes per-byte lookup tables for all permutations.
+
+    Parameters:
+        perm_tuples: List of permutations (tuples mapping output to input positions).
+        N:           Number of sites.
+
+    Returns:
+        uint64 array of shape (|G|, n_bytes, 256), or (|G|, n_bytes, 256, W) with
+        multi-word images beyond 64 sites: luts[g, b, v] is the image under
+        permutation g of a configuration whose byte b equals v (all other bytes zero).
+    """
+    W = n_words(N)
+    n_bytes = (N + 7) // 8
+    luts = np.zeros((len(perm_tuples), n_bytes, 256, W), dtype=np.uint64)
+    values = np.arange(256)
+    for g, p in enumerate(perm_tuples):
+        for i, j in enumerate(p):
+            b, r = divmod(j, 8)
+            w, s = divmod(i, WORD_BITS)
+            luts[g, b, ((values >> r) & 1).astype(bool), w] |= np.uint64(1 << s)
+    return np.ascontiguousarray(luts[..., 0]) if W == 1 else luts
+
+def canonical_block(keys, luts):
+    """
+    Computes the canonical (minimum) form of every key of a block under all
+    permutations encoded in `luts` (see perm_luts): a uint64 array of bitvectors,
+    or an (n, W) array of rows.
+    """
+    n_bytes = luts.shape[1]
+    words = keys[:, None] if keys.ndim == 1 else keys
+    byte_vals = [((words[:, b // 8] >> np.uint64(8 * (b % 8))) & np.uint64(0xFF)).astype(np.intp)
+                 for b in range(n_bytes)]
+    canon = keys.copy()
+    for lut in luts:
+        img = lut[0][byte_vals[0]]
+        for b in range(1, n_bytes):
+            img |= lut[b][byte_vals[b]]
+        if keys.ndim == 1:
+            np.minimum(canon, img, out=canon)
+        else:
+            smaller = less(img, canon)
+            canon[smaller] = img[smaller]
+    return canon
@@ -3,63 +3,179 @@ Script for the efficient calculation of the number of symmetry-unique configurat
 using Burnside's lemma.
 
 This module enables to:
-  - Precompute and cache the cycle structure of all symmetry operations for a site set.
-  - Quickly compute, for any number k of I atoms, the number of unique configurations
-    (i.e., orbits) under symmetry, without explicit enumeration.
-  - Autogenerate the cache if missing (with the group permutations provided).
+  - Precompute and cache the cycle type of all symmetry operations for a site set.
+  - Expand the Pólya cycle-index polynomial once, which gives the number of unique
+    configurations (i.e., orbits) under symmetry for every k = 0..N I atoms at the
+    same time, without explicit enumeration.
+  - Autogenerate the cache if missing or stale (with the group permutations provided).
+  - Count the unique configurations with more than two species (e.g. Cl/Br/I) for
+    a given composition, from the multinomial cycle index (see species_count).
+  - Compute, for every k, how many orbits have each degeneracy (orbit size), from the
+    subgroup lattice of the group (table of marks and Möbius inversion), again
+    without explicit enumeration.
 
-The cache is stored as a pickle file, one per site set (distinguished by `sphere`).
+The cache is stored as a pickle file per site set (`sphere`) and permutation table,
+and kept in memory after the first use. Both are keyed by a digest of the permutation
+table, which encodes the geometry and the group, so switching between groups (or
+geometries) reuses the cache of each instead of rebuilding it.
 """
 
-from math import comb
+from collections import Counter
+import hashlib
 import pickle, pathlib
 
-def get_cache_path(sphere):
+_MEMORY_CACHE = {}  # {permutations_key: (cycle_types, group_order, orbit_counts)}
+_HISTOGRAM_CACHE = {}  # {permutations_key: degeneracy histograms for k = 0..N}
+
+def get_cache_path(sphere, key):
     """
-    Returns the cache path for a given site set (sphere).
+    Returns the cache path for a given site set (sphere) and permutation table digest.
     """
-    return pathlib.Path(__file__).with_name(f'burnside.sphere{sphere}.cycles.pkl')
+    return pathlib.Path(__file__).with_name(f'burnside.sphere{sphere}.{key[:16]}.cycles.pkl')
 
-def _cycle_structure_from_permutation(p):
+def permutations_key(permutations):
+    """
+    Returns a digest identifying a permutation table (site set and group).
+    """
+    table = tuple(tuple(int(i) for i in p) for p in permutations)
+    return hashlib.sha1(repr(table).encode()).hexdigest()
+
+def _cycle_type_from_permutation(p):
     """
     Given a permutation of N sites (as a list of length N),
-    returns the number of cycles in the permutation.
+    returns its cycle type: the sorted tuple of its cycle lengths.
 
-    Example: p = [2,0,1] (0->2, 1->0, 2->1) has one 3-cycle.
+    Example: p = [2,0,1,3] (0->2, 1->0, 2->1, 3->3) has cycle type (1, 3).
     """
     seen = set()
-    cycles = 0
+    lengths = []
     for i in range(len(p)):
         if i in seen:
             continue
-        cycles += 1
+        length = 0
         j = i
-        while p[j] not in seen:
+        while j not in seen:
             seen.add(j)
             j = p[j]
-    return cycles
+            length += 1
+        lengths.append(length)
+    return tuple(sorted(lengths))
+
+def _orbit_counts(cycle_types, group_order):
+    """
+    Expands the cycle-index polynomial: a permutation with cycle lengths l_1, l_2, ...
+    fixes as many k-subsets as the coefficient of x^k in prod_c (1 + x^l_c).
+    Averaging over the group gives the number of orbits for every k.
 
-def prepare_cycle_cache(permutations, group_order=16, sphere=1):
+    Returns:
+        List of length N + 1: the number of unique configurations for k = 0..N.
     """
-    Computes the cycle structure of each permutation (symmetry operation)
+    N = sum(cycle_types[0])
+    total = [0] * (N + 1)
+    for lengths, mult in Counter(cycle_types).items():
+        poly = [1]
+        for l in lengths:
+            new = poly + [0] * l
+            for d, c in enumerate(poly):
+                new[d + l] += c
+            poly = new
+        for d, c in enumerate(poly):
+            total[d] += mult * c
+    return [t // group_order for t in total]
+
+def prepare_cycle_cache(permutations, group_order=None, sphere=1):
+    """
+    Computes the cycle type of each permutation (symmetry operation)
     and saves it, along with the group order, to a cache file for fast lookup.
 
     Parameters:
         permutations: List of permutations (each as a list or tuple of site indices).
-        group_order:  Order of the symmetry group (number of group elements).
+        group_order:  Order of the symmetry group (default: number of permutations).
         sphere:       Integer ID for the site set (to distinguish caches).
     """
-    cycles = [_cycle_structure_from_permutation(p) for p in permutations]
-    cache_path = get_cache_path(sphere)
-    with cache_path.open('wb') as f:
-        pickle.dump((cycles, group_order), f)
+    if group_order is None:
+        group_order = len(permutations)
+    key = permutations_key(permutations)
+    cycle_types = [_cycle_type_from_permutation(p) for p in permutations]
+    with get_cache_path(sphere, key).open('wb') as f:
+        pickle.dump((key, cycle_types, group_order), f)
+    _MEMORY_CACHE[key] = (cycle_types, group_order, _orbit_counts(cycle_types, group_order))
+
+def _load_cycle_cache(path, key=None):
+    """
+    Loads a cache file into memory.
+
+    Returns:
+        The digest of its permutation table, or None if no cache in the current format
+        (for the permutation table `key`, if given) was found.
+    """
+    try:
+        with path.open('rb') as f:
+            data = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    if len(data) != 3:  # cycle counts of an older version, not cycle types
+        return None
+    file_key, cycle_types, group_order = data
+    if key is not None and file_key != key:
+        return None
+    _MEMORY_CACHE[file_key] = (cycle_types, group_order, _orbit_counts(cycle_types, group_order))
+    return file_key
+
+def _cycle_cache(sphere, perms, group_order):
+    """
+    Returns the cached (cycle_types, group_order, orbit_counts) of the permutation table
+    `perms`, from memory, then from disk, building it if needed. Without `perms`, the
+    sphere must have exactly one cached table, which is then used.
+    """
+    if perms is not None:
+        key = permutations_key(perms)
+        if key not in _MEMORY_CACHE and _load_cycle_cache(get_cache_path(sphere, key), key) is None:
+            prepare_cycle_cache(perms, group_order, sphere)
+        return _MEMORY_CACHE[key]
+    paths = pathlib.Path(__file__).parent.glob(f'burnside.sphere{sphere}.*.cycles.pkl')
+    keys = {key for key in map(_load_cycle_cache, paths) if key is not None}
+    if not keys:
+        raise RuntimeError(
+            f"No Burnside cache found for sphere={sphere} and perms not provided to create it."
+        )
+    if len(keys) > 1:
+        raise RuntimeError(
+            f"Burnside caches of {len(keys)} permutation tables found for sphere={sphere}: "
+            f"provide perms to select one."
+        )
+    return _MEMORY_CACHE[keys.pop()]
 
-def burnside_count(N, k, sphere=1, perms=None, group_order=16):
+def orbit_counts(sphere=1, perms=None, group_order=None):
+    """
+    Returns the number of symmetry-unique configurations for every k = 0..N,
+    from one expansion of the cycle-index polynomial.
+
+    The cycle cache of the permutation table is looked up in memory first, then on
+    disk, and built if missing. Without `perms`, the only table cached for the sphere is used.
+
+    Parameters:
+        sphere: Integer ID for the site set (default 1).
+        perms:  List of group permutations (if cache needs to be built or checked).
+        group_order: Order of the symmetry group (default: number of permutations).
+
+    Returns:
+        List of length N + 1 of unique configuration counts (int).
+
+    Raises:
+        RuntimeError if `perms` is not supplied and the sphere does not have exactly
+        one cached permutation table.
+    """
+    return _cycle_cache(sphere, perms, group_order)[2]
+
+def burnside_count(N, k, sphere=1, perms=None, group_order=None):
     """
     Calculates the number of symmetry-unique ways to place k I atoms on N sites,
     under the action of a symmetry group, using Burnside's lemma.
+    The counts for all k come from one cached polynomial expansion (see orbit_counts),
+    so a sweep over compositions costs a list lookup per k.
 
-    If the cycle cache does not exist for this sphere, and `perms` is given,
+    If the cycle cache does not exist for this permutation table, and `perms` is given,
     it creates the cache and proceeds.
 
     Parameters:
@@ -67,24 +183,191 @@ def burnside_count(N, k, sphere=1, perms=None, group_order=16):
         k:      Number of I atoms (int).
         sphere: Integer ID for the site set (default 1).
         perms:  List of group permutations (if cache needs to be built).
-        group_order: Order of the symmetry group (default 16 for D4h).
+        group_order: Order of the symmetry group (default: number of permutations).
 
     Returns:
         Number of unique configurations (int).
 
     Raises:
-        RuntimeError if cache does not exist and `perms` is not supplied.
+        RuntimeError if `perms` is not supplied and the sphere does not have exactly
+        one cached permutation table.
+        ValueError if the cache was built for a different number of sites.
     """
-    cache_path = get_cache_path(sphere)
-    try:
-        cycles, gsize = pickle.load(cache_path.open('rb'))
-    except FileNotFoundError:
-        if perms is None:
-            raise RuntimeError(
-                f"Burnside cache '{cache_path}' not found and perms not provided to create it."
-            )
-        # Create the cache and try again
-        prepare_cycle_cache(perms, group_order, sphere)
-        cycles, gsize = pickle.load(cache_path.open('rb'))
-    S = sum(comb(c, k) for c in cycles)
-    return S // gsize
+    counts = orbit_counts(sphere, perms, group_order)
+    if len(counts) != N + 1:
+        raise ValueError(f"Burnside cache for sphere={sphere} has {len(counts) - 1} sites, not {N}")
+    return counts[k]
+
+def _species_fixed(lengths, composition):
+    """
+    Number of configurations with the given composition fixed by a permutation with
+    cycle lengths `lengths`: the coefficient of prod_s x_s^n_s in
+    prod_c (x_1^l_c + ... + x_m^l_c), i.e. the ways to give every cycle one species.
+    """
+    # Polynomial as {numbers of sites of species 0..m-2: coefficient}, the last species implied
+    poly = {(0,) * (len(composition) - 1): 1}
+    for l in lengths:
+        new = Counter()
+        for counts, c in poly.items():
+            new[counts] += c  # the cycle holds the last species
+            for s in range(len(counts)):
+                if counts[s] + l <= composition[s]:
+                    new[counts[:s] + (counts[s] + l,) + counts[s + 1:]] += c
+        poly = new
+    return poly.get(tuple(composition[:-1]), 0)
+
+def species_count(composition, sphere=1, perms=None, group_order=None):
+    """
+    Calculates the number of symmetry-unique configurations with several species,
+    composition[s] sites holding species s, with the multinomial cycle index
+    (Pólya's theorem): the average over the group of _species_fixed.
+    The cycle types are taken from the same cache as burnside_count.
+
+    Parameters:
+        composition: Number of sites of every species (tuple of int, summing to N).
+        sphere: Integer ID for the site set (default 1).
+        perms:  List of group permutations (if cache needs to be built).
+        group_order: Order of the symmetry group (default: number of permutations).
+
+    Returns:
+        Number of unique configurations (int).
+
+    Raises:
+        RuntimeError if `perms` is not supplied and the sphere does not have exactly
+        one cached permutation table.
+        ValueError if the cache was built for a different number of sites.
+    """
+    cycle_types, group_order, counts = _cycle_cache(sphere, perms, group_order)
+    if len(counts) != sum(composition) + 1:
+        raise ValueError(f"Burnside cache for sphere={sphere} has {len(counts) - 1} sites, "
+                         f"not {sum(composition)}")
+    total = sum(mult * _species_fixed(lengths, composition)
+                for lengths, mult in Counter(cycle_types).items())
+    return total // group_order
+
+def _subgroups(elements, identity):
+    """
+    Returns all subgroups of the group `elements`, each as a frozenset of permutations,
+    by repeatedly adding one element g to known subgroups H and taking the closure.
+
+    The elements are numbered and composed through their multiplication table, and
+    K = <H, g> is closed from the generators of H plus g, not from all of H. All the
+    elements of a cyclic subgroup <g> give the same K, so g is tried once per cyclic
+    subgroup not in H. Practical for point groups (up to a few hundred elements).
+    """
+    elements = sorted(elements)
+    index = {p: a for a, p in enumerate(elements)}
+    table = [[index[tuple(a[i] for i in b)] for b in elements] for a in elements]
+    e = index[identity]
+
+    def close(generators):
+        found = {e}
+        frontier = [e]
+        while frontier:
+            new = []
+            for a in frontier:
+                row = table[a]
+                for g in generators:
+                    c = row[g]
+                    if c not in found:
+                        found.add(c)
+                        new.append(c)
+            frontier = new
+        return frozenset(found)
+
+    cyclic = {}  # {cyclic subgroup: one generator}
+    for g in range(len(elements)):
+        cyclic.setdefault(close((g,)), g)
+    generators = {frozenset([e]): ()}  # {subgroup: its generators}
+    frontier = list(generators)
+    while frontier:
+        new = []
+        for H in frontier:
+            for C, g in cyclic.items():
+                if C <= H:
+                    continue
+                K = close(generators[H] + (g,))
+                if K not in generators:
+                    generators[K] = generators[H] + (g,)
+                    new.append(K)
+        frontier = new
+    return [frozenset(elements[a] for a in K) for K in generators]
+
+def _marks(subgroup, N):
+    """
+    Number of k-subsets fixed by every element of `subgroup`, for k = 0..N.
+    A fixed subset is a union of site orbits of the subgroup, so this is the
+    coefficient list of prod_O (1 + x^|O|) over the site orbits O.
+    """
+    parent = list(range(N))
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    for h in subgroup:
+        for i, j in enumerate(h):
+            parent[find(i)] = find(j)
+    sizes = Counter(find(i) for i in range(N)).values()
+    poly = [1] + [0] * N
+    for l in sizes:
+        for d in range(N - l, -1, -1):
+            poly[d + l] += poly[d]
+    return poly
+
+def _degeneracy_histograms(permutations):
+    """
+    For every k = 0..N, the number of orbits of each degeneracy.
+
+    For each subgroup H, the marks m(H) count the subsets fixed by H, and the subsets
+    whose stabilizer is exactly H follow by Möbius inversion over the subgroup lattice:
+    f(H) = m(H) - sum of f(K) over the subgroups K strictly containing H.
+    Those subsets lie in orbits of size |G| / |H|, each orbit holding |G| / |H| of them.
+
+    Returns:
+        List of length N + 1 of dicts {degeneracy: number of orbits}.
+    """
+    elements = {tuple(int(i) for i in p) for p in permutations}
+    N = len(next(iter(elements)))
+    identity = tuple(range(N))
+    order = len(elements)
+    subgroups = sorted(_subgroups(elements, identity), key=len, reverse=True)
+    exact = []
+    for H in subgroups:
+        f = _marks(H, N)
+        for K, f_K in exact:
+            if len(K) > len(H) and H < K:
+                f = [a - b for a, b in zip(f, f_K)]
+        exact.append((H, f))
+    histograms = [Counter() for _ in range(N + 1)]
+    for H, f in exact:
+        degeneracy = order // len(H)
+        for k, n_subsets in enumerate(f):
+            if n_subsets:
+                histograms[k][degeneracy] += n_subsets
+    return [{d: n // d for d, n in sorted(h.items())} for h in histograms]
+
+def degeneracy_histogram(N, k, perms):
+    """
+    Returns how many symmetry-unique configurations of k I atoms on N sites have
+    each degeneracy (number of symmetry-equivalent arrangements), without enumeration.
+    The histograms for all k are computed once per permutation table and kept in memory.
+
+    Parameters:
+        N:      Number of sites (int).
+        k:      Number of I atoms (int).
+        perms:  List of group permutations.
+
+    Returns:
+        Dictionary {degeneracy (int): number of unique configurations (int)}.
+
+    Raises:
+        ValueError if the permutations do not act on N sites.
+    """
+    key = permutations_key(perms)
+    if key not in _HISTOGRAM_CACHE:
+        _HISTOGRAM_CACHE[key] = _degeneracy_histograms(perms)
+    histograms = _HISTOGRAM_CACHE[key]
+    if len(histograms) != N + 1:
+        raise ValueError(f"Permutations act on {len(histograms) - 1} sites, not {N}")
+    return histograms[k]
@@ -0,0 +1,513 @@
+"""
+Compact, array-backed storage for enumeration results.
+
+Instead of one Python dict keyed by big ints (~100+ bytes per entry), unique
+configurations are kept as a sorted uint64 array of canonical bitvectors and a
+uint16 array of degeneracies (10 bytes per entry). Beyond 64 sites, each bitvector
+is a row of W uint64 words (an (n, W) key array, see bitset.py), sorted in the same
+order as the corresponding ints.
+
+This module provides:
+- `to_run`: converts a worker's partial {bitvector: count} dict into sorted arrays.
+- `merge_runs`: merges sorted runs from several workers, summing degeneracies.
+- `UniqueConfigs`: a read-only mapping view over the arrays, so existing code that
+  iterates over `.items()` or calls `len()` keeps working. Since the keys are sorted,
+  it is also a rank/unrank index: `at(i)`, `slice(a, b)` and `rank(key)` give random
+  access to the i-th canonical configuration without touching the others.
+- Out-of-core support: workers can spill their sorted runs to files, which are then
+  combined by a streaming external merge into one on-disk store of fixed-size
+  (key, degeneracy) records, opened as a memory-mapped UniqueConfigs.
+- `run_tasks`: runs a worker function over its tasks on a worker pool (a new one if
+  none is given) and gathers the results, for every enumeration method. All methods
+  share one pool initializer, `init_worker`, and build the per-process tables they
+  need on first use (`worker_table`).
+- Checkpointing: with a `Checkpoint`, the run of every completed work unit is saved
+  to a state directory as soon as it arrives, and a resumed job skips those units.
+- `ResultCache`: a persistent on-disk cache of enumeration results, shared by all
+  processes, with least-recently-used eviction under a byte budget.
+
+Limitations:
+- Degeneracies are stored as uint16, i.e. groups of order up to 65535.
+"""
+
+import os
+import multiprocessing as mp
+import pickle
+import shutil
+import tempfile
+from collections.abc import Mapping
+import numpy as np
+from bitset import (n_words, to_words, to_ints, int_at, lex_order, run_starts, search,
+                    site_masks, perm_luts)
+
+MERGE_FANIN = 32             # number of pending runs merged at once while results arrive
+MERGE_MEMORY = 256 * 2**20   # bytes of run buffers held at once by the external merge
+ITEMS_CHUNK = 1 << 20        # entries converted to Python ints at a time when iterating
+
+_WORKER_PERMS = None         # per-process permutation table, set by init_worker
+_WORKER_TABLES = {}          # per-process tables derived from it, {name: table}
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'result_cache')
+CACHE_BYTES = 2 * 2**30      # default byte budget of a ResultCache
+
+RECORD_DTYPE = np.dtype([('key', '<u8'), ('deg', '<u2')])  # on-disk record
+
+def record_dtype(W):
+    """
+    On-disk record for keys of W words: RECORD_DTYPE, or a (W,) key field beyond 64 sites.
+    """
+    return RECORD_DTYPE if W == 1 else np.dtype([('key', '<u8', (W,)), ('deg', '<u2')])
+
+def _key_words(keys):
+    """Number of words per key of a key array (1 for a plain uint64 array)."""
+    return 1 if keys.ndim == 1 else keys.shape[1]
+
+def _empty_keys(N):
+    """Empty key array for N sites."""
+    W = n_words(N)
+    return np.zeros(0, dtype=np.uint64) if W == 1 else np.zeros((0, W), dtype=np.uint64)
+
+def to_run(seen, N=64):
+    """
+    Converts a {canonical_bitvector: count} dict on N sites into (keys, degeneracies)
+    arrays sorted by key (keys as rows of words if N > 64).
+    """
+    degs = np.fromiter(seen.values(), dtype=np.uint16, count=len(seen))
+    if N > 64:
+        keys = to_words(seen.keys(), n_words(N))
+        order = lex_order(keys)
+    else:
+        keys = np.fromiter(seen.keys(), dtype=np.uint64, count=len(seen))
+        order = np.argsort(keys)
+    return keys[order], degs[order]
+
+def merge_runs(runs):
+    """
+    Merges sorted (keys, degeneracies) runs into one, summing the degeneracies of equal keys.
+
+    The runs are concatenated and stably sorted; the stable sort (timsort) detects the
+    pre-sorted runs, so this is a k-way merge rather than a full sort. Multi-word keys
+    are sorted by np.lexsort on their words instead.
+    """
+    if len(runs) == 1:
+        return runs[0]
+    keys = np.concatenate([r[0] for r in runs])
+    degs = np.concatenate([r[1] for r in runs])
+    if len(keys) == 0:
+        return keys, degs
+    if keys.ndim == 1:
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    else:
+        order = lex_order(keys)
+        keys = keys[order]
+        starts = run_starts(keys)
+    degs = degs[order]
+    return keys[starts], np.add.reduceat(degs, starts).astype(np.uint16)
+
+def collect(parts, N):
+    """
+    Merges worker results as they arrive.
+
+    Parameters:
+        parts: Iterable of worker results, sorted (keys, degeneracies) runs.
+        N:     Number of sites.
+
+    Returns:
+        UniqueConfigs.
+    """
+    runs = []
+    for run in parts:
+        runs.append(run)
+        if len(runs) >= MERGE_FANIN:
+            runs = [merge_runs(runs)]
+    if not runs:
+        return UniqueConfigs(_empty_keys(N), np.zeros(0, dtype=np.uint16))
+    return UniqueConfigs(*merge_runs(runs))
+
+def write_run(run, path):
+    """
+    Writes a sorted (keys, degeneracies) run to `path` as raw records (see record_dtype).
+    """
+    records = np.empty(len(run[0]), dtype=record_dtype(_key_words(run[0])))
+    records['key'] = run[0]
+    records['deg'] = run[1]
+    records.tofile(path)
+
+def _read_records(path, W=1):
+    """
+    Memory-maps a file of records with W key words (an empty array for an empty file).
+    """
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=record_dtype(W))
+    return np.memmap(path, dtype=record_dtype(W), mode='r')
+
+def open_store(path, N=64):
+    """
+    Opens an on-disk store of configurations on N sites, written by external_merge,
+    as a memory-mapped UniqueConfigs.
+    """
+    records = _read_records(path, n_words(N))
+    return UniqueConfigs(records['key'], records['deg'])
+
+def spill_task(args):
+    """
+    Pool task wrapper for out-of-core runs: runs `worker(task)` and writes the
+    resulting sorted run to a new file in `directory`, returning the file path
+    instead of the data.
+
+    Parameters:
+        args: (worker, task, directory)
+    """
+    worker, task, directory = args
+    fd, path = tempfile.mkstemp(suffix='.run', dir=directory)
+    os.close(fd)
+    write_run(worker(task), path)
+    return path
+
+def external_merge(paths, out_path, memory=MERGE_MEMORY, N=64):
+    """
+    Streaming k-way merge of sorted run files into one sorted store, summing the
+    degeneracies of equal keys.
+
+    Each run is read through a buffer of memory / len(paths) bytes. In every round
+    the smallest last key among the buffers is a safe bound: no run can still hold
+    a smaller key beyond its buffer, so all keys up to the bound are merged and written.
+
+    Parameters:
+        paths:    Files of sorted records (each key at most once per file).
+        out_path: Output file, written through a temporary file and an atomic rename,
+                  so that an existing store is always complete.
+        memory:   Approximate memory budget for the run buffers, in bytes.
+        N:        Number of sites (sets the record size).
+    """
+    dtype = record_dtype(n_words(N))
+    runs = [_read_records(p, n_words(N)) for p in paths]
+    buffer = max(1024, memory // (dtype.itemsize * max(1, len(runs))))
+    pos = [0] * len(runs)
+    with open(out_path + '.tmp', 'wb') as out:
+        while True:
+            active = [i for i, r in enumerate(runs) if pos[i] < len(r)]
+            if not active:
+                break
+            bound = min(int_at(runs[i]['key'], min(pos[i] + buffer, len(runs[i])) - 1)
+                        for i in active)
+            pieces = []
+            for i in active:
+                keys = runs[i]['key'][pos[i]:pos[i] + buffer]
+                stop = pos[i] + search(keys, bound + 1)
+                pieces.append((np.asarray(runs[i]['key'][pos[i]:stop]),
+                               np.asarray(runs[i]['deg'][pos[i]:stop])))
+                pos[i] = stop
+            keys, degs = merge_runs(pieces)
+            records = np.empty(len(keys), dtype=dtype)
+            records['key'] = keys
+            records['deg'] = degs
+            records.tofile(out)
+    os.replace(out_path + '.tmp', out_path)
+
+class Checkpoint:
+    """
+    State directory for a resumable enumeration job.
+
+    The directory holds a manifest (the job description and its list of work units)
+    and one run file per completed unit. Run files are written atomically, so an
+    interrupted job never leaves a partial unit behind.
+
+    Parameters:
+        directory: State directory of this job.
+        job:       Dict identifying the job (sites, k, method, group); a resumed job
+                   must match the manifest.
+        resume:    If True, reuse the manifest and completed units found in `directory`;
+                   otherwise start from scratch.
+    """
+
+    def __init__(self, directory, job, resume=False):
+        self.directory = directory
+        self.job = job
+        self.resume = resume
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, 'manifest.pkl')
+
+    def unit_path(self, i):
+        return os.path.join(self.directory, f'unit_{i}.run')
+
+    def prepare(self, tasks):
+        """
+        Returns the task list of the job: the one of the manifest when resuming,
+        otherwise `tasks`, written to a fresh manifest.
+        """
+        if self.resume and os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'rb') as f:
+                job, saved_tasks = pickle.load(f)
+            if job != self.job:
+                raise ValueError(f"State directory '{self.directory}' belongs to job {job}, "
+                                 f"not {self.job}")
+            return saved_tasks
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory)
+        with open(self.manifest_path, 'wb') as f:
+            pickle.dump((self.job, tasks), f)
+        return tasks
+
+class ResultCache:
+    """
+    Directory of stores (one record file per result), addressed by name.
+
+    Reading a result refreshes its modification time; after every write, the least
+    recently used results are deleted until the directory fits in `max_bytes`.
+    Files are written atomically, so concurrent processes only ever see complete results.
+
+    Parameters:
+        directory: Cache directory (default: CACHE_DIR, next to this module).
+        max_bytes: Byte budget of the cache (default: CACHE_BYTES).
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def path(self, name):
+        return os.path.join(self.directory, f'{name}.bin')
+
+    def get(self, name, N=64):
+        """
+        Returns the memory-mapped UniqueConfigs on N sites cached as `name`, or None.
+        """
+        path = self.path(name)
+        try:
+            os.utime(path)
+            return open_store(path, N)
+        except FileNotFoundError:  # never stored, or evicted meanwhile
+            return None
+
+    def put(self, name, configs):
+        """
+        Caches the UniqueConfigs `configs` as `name`, then evicts down to the budget.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(name)
+        fd, tmp = tempfile.mkstemp(suffix='.tmp', dir=self.directory)
+        os.close(fd)
+        write_run((configs.keys_array, configs.degeneracies), tmp)
+        os.replace(tmp, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes the least recently used results until the cache fits in max_bytes.
+        """
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.bin'):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        used = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if used <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            used -= size
+
+def checkpoint_task(args):
+    """
+    Pool task wrapper for checkpointed runs: runs `worker(task)` and saves the
+    resulting sorted run to `path` (through a temporary file and an atomic rename).
+
+    Parameters:
+        args: (worker, task, path)
+    """
+    worker, task, path = args
+    write_run(worker(task), path + '.tmp')
+    os.replace(path + '.tmp', path)
+    return path
+
+def _checkpointed_runs(pool, worker, tasks, checkpoint):
+    """
+    Runs the units of a checkpointed job that are not completed yet.
+
+    Returns:
+        Paths of the run files of all units.
+    """
+    tasks = checkpoint.prepare(tasks)
+    paths = [checkpoint.unit_path(i) for i in range(len(tasks))]
+    pending = [(worker, t, p) for t, p in zip(tasks, paths) if not os.path.exists(p)]
+    for _ in pool.imap_unordered(checkpoint_task, pending):
+        pass
+    return paths
+
+def gather(pool, worker, tasks, N, out_path=None, checkpoint=None):
+    """
+    Runs `worker` over `tasks` on `pool` and merges the results.
+
+    Parameters:
+        pool, worker, tasks: Worker pool, worker function and its task list.
+        N:          Number of sites.
+        out_path:   If given, enumerate out of core: runs are spilled to a temporary
+                    directory next to `out_path` and externally merged into it.
+        checkpoint: If given (a Checkpoint), the run of each completed unit is saved
+                    to its state directory, and units found there are skipped.
+
+    Returns:
+        UniqueConfigs, memory-mapped out of core.
+    """
+    if out_path is None and checkpoint is None:
+        return collect(pool.imap_unordered(worker, tasks), N)
+    if checkpoint is not None:
+        paths = _checkpointed_runs(pool, worker, tasks, checkpoint)
+        if out_path is None:
+            runs = []
+            for p in paths:
+                records = np.fromfile(p, dtype=record_dtype(n_words(N)))
+                runs.append((records['key'], records['deg']))
+            return collect(runs, N)
+        external_merge(paths, out_path, N=N)
+        return open_store(out_path, N)
+    spill_dir = tempfile.mkdtemp(prefix='runs_', dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        paths = list(pool.imap_unordered(spill_task, [(worker, t, spill_dir) for t in tasks]))
+        external_merge(paths, out_path, N=N)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    return open_store(out_path, N)
+
+def init_worker(perm_tuples):
+    """
+    Pool initializer shared by all enumeration methods: ships the permutation table
+    to a worker process once. The tables derived from it are built on first use (see
+    worker_table), so that a pool only pays for the methods it runs.
+    """
+    global _WORKER_PERMS
+    _WORKER_PERMS = perm_tuples
+    _WORKER_TABLES.clear()
+
+def worker_perms():
+    """
+    The permutation table of this worker process, set by init_worker.
+    """
+    return _WORKER_PERMS
+
+def worker_table(name, build):
+    """
+    The table `name` of this worker process, built once as build(perm_tuples) and
+    shared by every method asking for it under the same name.
+    """
+    if name not in _WORKER_TABLES:
+        _WORKER_TABLES[name] = build(_WORKER_PERMS)
+    return _WORKER_TABLES[name]
+
+def worker_masks():
+    """
+    The site masks of this worker process (see bitset.site_masks), one table shared
+    by all methods.
+    """
+    return worker_table('site_masks', lambda perms: site_masks(perms, len(perms[0])))
+
+def worker_luts():
+    """
+    The per-byte lookup tables of this worker process (see bitset.perm_luts).
+    """
+    return worker_table('luts', lambda perms: perm_luts(perms, len(perms[0])))
+
+def run_tasks(worker, tasks, N, perm_tuples, pool=None, out_path=None, checkpoint=None):
+    """
+    Runs `worker` over `tasks` and merges the results (see gather).
+
+    The enumeration functions of the other modules pass these arguments through:
+        pool:       Optional multiprocessing pool whose workers were initialized with
+                    init_worker for the same permutations. If None, a new pool is
+                    created for perm_tuples.
+        out_path:   If given, results are spilled to disk and merged into this file.
+        checkpoint: Optional Checkpoint to save completed work units to, and to
+                    resume from.
+
+    Returns:
+        UniqueConfigs, memory-mapped out of core.
+    """
+    if pool is None:
+        with mp.Pool(initializer=init_worker, initargs=(perm_tuples,)) as pool:
+            return gather(pool, worker, tasks, N, out_path, checkpoint)
+    return gather(pool, worker, tasks, N, out_path, checkpoint)
+
+class UniqueConfigs(Mapping):
+    """
+    Read-only mapping {canonical_bitvector (int): degeneracy (int)} backed by
+    a sorted uint64 key array (an (n, W) array of multi-word rows beyond 64 sites)
+    and a uint16 degeneracy array.
+
+    Behaves like the dict returned by earlier versions of enumerate_unique
+    (iteration in increasing key order, len, lookup, items, equality with dicts).
+    """
+
+    def __init__(self, keys, degeneracies):
+        self.keys_array = keys
+        self.degeneracies = degeneracies
+
+    def __len__(self):
+        return len(self.keys_array)
+
+    def __iter__(self):
+        return (key for key, _ in self.items())
+
+    def _keys(self, start, stop):
+        """Keys start..stop-1 as a list of ints."""
+        keys = self.keys_array[start:stop]
+        return keys.tolist() if keys.ndim == 1 else to_ints(keys)
+
+    def __getitem__(self, key):
+        return int(self.degeneracies[self.rank(key)])
+
+    def rank(self, key):
+        """
+        Position of the canonical configuration `key` in increasing key order.
+
+        Raises:
+            KeyError if `key` is not a unique configuration of this set.
+        """
+        if not 0 <= key < 1 << (64 * _key_words(self.keys_array)):
+            raise KeyError(key)
+        i = search(self.keys_array, key)
+        if i == len(self.keys_array) or int_at(self.keys_array, i) != key:
+            raise KeyError(key)
+        return i
+
+    def at(self, i):
+        """
+        The i-th unique configuration in increasing key order (negative i counts
+        from the end), as a (canonical_bitvector, degeneracy) pair.
+        """
+        return int_at(self.keys_array, i), int(self.degeneracies[i])
+
+    def slice(self, start, stop):
+        """
+        Unique configurations start..stop-1 in increasing key order, as a list of
+        (canonical_bitvector, degeneracy) pairs; only those records are read.
+        """
+        return list(zip(self._keys(start, stop), self.degeneracies[start:stop].tolist()))
+
+    def items(self):
+        # Converted chunk by chunk, so memory-mapped stores are streamed from disk
+        for i in range(0, len(self), ITEMS_CHUNK):
+            yield from zip(self._keys(i, i + ITEMS_CHUNK),
+                           self.degeneracies[i:i + ITEMS_CHUNK].tolist())
+
+    def values(self):
+        for i in range(0, len(self), ITEMS_CHUNK):
+            yield from self.degeneracies[i:i + ITEMS_CHUNK].tolist()
+
+    @property
+    def nbytes(self):
+        """Memory used by the underlying arrays."""
+        return self.keys_array.nbytes + self.degeneracies.nbytes
+
+    def __repr__(self):
+        return f"UniqueConfigs({len(self)} configurations)"
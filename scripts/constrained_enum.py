@@ -0,0 +1,139 @@
+"""
+Script for the enumeration of unique Br/I configurations (up to symmetry)
+that satisfy constraints, without enumerating the other configurations.
+
+Supported constraints (see Constraints):
+- Sites fixed to I or to Br (e.g. apical sites fixed to Br).
+- Number of I atoms on given sets of sites (e.g. per site orbit, see orbit_enum.site_orbits).
+- Forbidden pairs: sites that must not both hold an I atom (e.g. bonded sites,
+  see bonded_pairs).
+
+This module:
+- Reduces the group to the subgroup of operations that preserve the constraints:
+  two valid configurations are equivalent if one of these operations maps one
+  onto the other, and the valid configurations are closed under it.
+- Builds the configurations by orderly generation under that subgroup (see
+  orderly_enum.py), pruning a prefix as soon as it breaks a constraint or cannot
+  be completed into a valid configuration, so whole subtrees are never visited.
+- Returns the same {canonical_bitvector: degeneracy} mapping as fast_enum, with
+  canonical forms and degeneracies taken in the subgroup.
+
+When the constraints are symmetric under the whole group (e.g. forbidden pairs from
+a symmetric bond list) the subgroup is the group itself, and the result is the
+subset of the unconstrained enumeration that satisfies the constraints.
+"""
+
+from math import comb
+from bitset import site_masks, image, popcount
+from orderly_enum import enumerate_orderly
+
+def bonded_pairs(connections):
+    """
+    Converts a bond list with the central atom as atom 0 (see visualize.get_connections)
+    to pairs of sites (site i is atom i + 1), dropping the bonds to the central atom.
+    """
+    return [(a - 1, b - 1) for a, b in connections if a > 0 and b > 0]
+
+class Constraints:
+    """
+    Constraints on the configurations to enumerate.
+
+    Parameters:
+        fixed_i:   Sites that must hold an I atom.
+        fixed_br:  Sites that must hold a Br atom.
+        counts:    Mapping {sites (tuple): number of I atoms on these sites}.
+        forbidden: Pairs of sites that must not both hold an I atom.
+
+    Raises:
+        ValueError if a site is negative, fixed to both I and Br, or paired with itself.
+    """
+
+    def __init__(self, fixed_i=(), fixed_br=(), counts=None, forbidden=()):
+        counts = counts or {}
+        self.forbidden = {frozenset(pair) for pair in forbidden}
+        if any(len(pair) != 2 for pair in self.forbidden):
+            raise ValueError("A forbidden pair must hold two different sites")
+        sites = set(fixed_i).union(fixed_br, *counts, *self.forbidden)
+        if any(i < 0 for i in sites):
+            raise ValueError(f"Site {min(sites)} is negative")
+        self.sites = sum(1 << i for i in sites)  # every site a constraint refers to
+        self.fixed_i = sum(1 << i for i in set(fixed_i))
+        self.fixed_br = sum(1 << i for i in set(fixed_br))
+        if self.fixed_i & self.fixed_br:
+            raise ValueError("A site cannot be fixed to both I and Br")
+        self.counts = [(sum(1 << i for i in set(sites)), n) for sites, n in counts.items()]
+
+    def check(self, N):
+        """
+        Raises ValueError if a constraint refers to a site beyond the N sites.
+        """
+        if self.sites >> N:
+            raise ValueError(f"Site {self.sites.bit_length() - 1} is out of range for {N} sites "
+                             f"(0 to {N - 1})")
+
+    def total(self, N, k):
+        """
+        Number of combinations of k I atoms on N sites that respect the fixed sites
+        (an upper bound on the number of valid combinations).
+        """
+        free = N - popcount(self.fixed_i | self.fixed_br)
+        n_fixed = popcount(self.fixed_i)
+        return comb(free, k - n_fixed) if k >= n_fixed else 0
+
+    def subgroup(self, perm_tuples, N):
+        """
+        Indices of the permutations that preserve the constraints: they map the fixed
+        sites, every counted set of sites and the set of forbidden pairs onto themselves.
+        """
+        sets = [self.fixed_i, self.fixed_br] + [mask for mask, _ in self.counts]
+        kept = []
+        for g, m in enumerate(site_masks(perm_tuples, N)):
+            site = [b.bit_length() - 1 for b in m]
+            if any(image(s, m) != s for s in sets):
+                continue
+            if any(frozenset(site[i] for i in pair) not in self.forbidden
+                   for pair in self.forbidden):
+                continue
+            kept.append(g)
+        return kept
+
+    def compiled(self, N):
+        """
+        The constraints as plain bitmasks, for the workers:
+        (fixed_i, fixed_br, counts, adjacent), where counts is a list of
+        (sites, number of I atoms, sites_above) with sites_above[x] the sites
+        of the set above x, and adjacent[x] the sites forbidden next to x.
+        """
+        adjacent = [0] * N
+        for a, b in self.forbidden:
+            adjacent[a] |= 1 << b
+            adjacent[b] |= 1 << a
+        counts = [(mask, n, [mask >> (x + 1) << (x + 1) for x in range(N)])
+                  for mask, n in self.counts]
+        return self.fixed_i, self.fixed_br, counts, adjacent
+
+def enumerate_constrained(N, k, permutations, constraints, pool=None, out_path=None,
+                          checkpoint=None):
+    """
+    Enumerate the unique Br/I configurations for k I on N sites that satisfy
+    `constraints`, up to the operations that preserve them (see the module docstring).
+
+    Parameters:
+        N:            Number of sites.
+        k:            Number of I atoms.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        constraints:  Constraints to satisfy.
+        pool, out_path, checkpoint: See config_store.run_tasks.
+
+    Returns:
+        Mapping {canonical_bitvector (int): degeneracy (int)}, the canonical forms
+        and degeneracies being taken in the subgroup (see Constraints.subgroup).
+
+    Raises:
+        ValueError if a constraint refers to a site beyond the N sites.
+    """
+    constraints.check(N)
+    perm_tuples = [tuple(p) for p in permutations]
+    return enumerate_orderly(N, k, perm_tuples, pool=pool, out_path=out_path,
+                             checkpoint=checkpoint, subgroup=constraints.subgroup(perm_tuples, N),
+                             cons=constraints.compiled(N))
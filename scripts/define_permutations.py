@@ -3,29 +3,63 @@ Utility functions for generating permutation mappings induced by symmetry operat
 on atomic coordinates.
 """
 
+import itertools
 import numpy as np
 import sym_operations as sym
 
 
+TOLERANCE = 1e-5  # coordinates closer than this (in every component) are the same site
+
+# Neighbouring grid cells, searched when a point is not in the cell of its site
+_NEIGHBOUR_CELLS = [d for d in itertools.product((0, -1, 1), repeat=3) if d != (0, 0, 0)]
+
+def _grid_cells(coords, tol):
+    """Returns the grid cell (integer tuple) of each coordinate, for a grid of spacing tol."""
+    return [tuple(c) for c in np.floor(np.asarray(coords, dtype=float) / tol).astype(np.int64).tolist()]
+
 # Find the permutation corresponding to a symmetry operation
-def find_permutation(original_coords, transformed_coords):
+def find_permutation(original_coords, transformed_coords, tol=TOLERANCE):
     """
     Given two coordinate lists, returns a list mapping each transformed coordinate
     to its index in the original coordinate list (i.e., the permutation applied).
 
+    Coordinates are snapped to a grid of spacing `tol` and looked up in a dict of the
+    original sites (checking the neighbouring cells only on a miss), so the cost is
+    O(N) instead of comparing every pair of sites.
+
     Args:
         original_coords (list): List of original coordinates.
         transformed_coords (list): Coordinates after symmetry operation.
+        tol (float): Largest difference per component between matching coordinates.
 
     Returns:
         permutation (list): List of indices representing the permutation.
+
+    Raises:
+        ValueError: If two original sites coincide, or a transformed coordinate
+                    matches no original site.
     """
+    original = np.asarray(original_coords, dtype=float)
+    transformed = np.asarray(transformed_coords, dtype=float)
+    sites = {}
+    for i, cell in enumerate(_grid_cells(original, tol)):
+        if cell in sites:
+            raise ValueError(f"Sites {sites[cell]} and {i} coincide at {original[i].tolist()}")
+        sites[cell] = i
+
     permutation = []
-    for point in transformed_coords:
-        for i, orig_point in enumerate(original_coords):
-            if np.allclose(point, orig_point):
-                permutation.append(i)
-                break
+    for i, cell in enumerate(_grid_cells(transformed, tol)):
+        j = sites.get(cell)
+        if j is None:
+            for d in _NEIGHBOUR_CELLS:
+                k = sites.get((cell[0] + d[0], cell[1] + d[1], cell[2] + d[2]))
+                if k is not None and np.all(np.abs(original[k] - transformed[i]) <= tol):
+                    j = k
+                    break
+        if j is None:
+            raise ValueError(f"Site {i} is mapped to {transformed[i].tolist()}, "
+                             f"which is not a site")
+        permutation.append(j)
     return permutation
 
 # functions that returns all the permutations for a given group
@@ -39,11 +73,66 @@ def find_all_permutations(group_operations, coordinates):
 
     Returns:
         permutations (dict): Dict of {operation_name: permutation_list}.
+
+    Raises:
+        ValueError: If an operation does not map the sites onto themselves.
     """
     permutations = {}
     for name, operation in group_operations.items():
         transformed_coords = sym.apply_symmetry_operation(operation, coordinates)
-        permutation = find_permutation(coordinates, transformed_coords)
+        try:
+            permutation = find_permutation(coordinates, transformed_coords)
+        except ValueError as e:
+            raise ValueError(f"Operation {name}: {e}") from e
         permutations[name] = permutation
 
     return permutations
+
+# Group generated by permutations
+def closure(generators, identity):
+    """
+    Returns the group generated by permutations, by composing the elements found so far
+    with the generators until no new permutation appears.
+
+    Args:
+        generators (iterable): Permutations (tuples of indices).
+        identity (tuple): Identity permutation of the same sites.
+
+    Returns:
+        elements (frozenset): All the permutations of the group (tuples).
+    """
+    elements = {identity}
+    frontier = [identity]
+    while frontier:
+        new = []
+        for a in frontier:
+            for g in generators:
+                c = tuple(a[i] for i in g)
+                if c not in elements:
+                    elements.add(c)
+                    new.append(c)
+        frontier = new
+    return frozenset(elements)
+
+def permutation_group(group, coordinates):
+    """
+    Builds the permutation table of a point group on the sites: only the generators
+    of the group are matched against the coordinates, the other elements follow by
+    closure on permutation composition (integer work only).
+
+    Args:
+        group (str): Point group name (see sym_operations.POINT_GROUPS).
+        coordinates (list): Atomic coordinates.
+
+    Returns:
+        permutations (list): Sorted list of the distinct permutations (tuples), identity first.
+
+    Raises:
+        ValueError: If a generator does not map the sites onto themselves.
+    """
+    try:
+        permutations = find_all_permutations(sym.group_generators(group), coordinates)
+    except ValueError as e:
+        raise ValueError(f"Sites are not symmetric under {group}. {e}") from e
+    generators = [tuple(p) for p in permutations.values()]
+    return sorted(closure(generators, tuple(range(len(coordinates)))))
@@ -10,15 +10,42 @@ This module:
 - Divides the enumeration across multiple CPU cores for scalability.
 - Returns both a dictionary of unique configurations (as canonical bitvectors)
   and their degeneracies (the number of symmetry-equivalent arrangements).
+- Draws unique configurations uniformly at random (see sample_unique), for the cases
+  that are too large to enumerate.
 
 Limitations:
 - Only feasible (timewise) for cases where total combinations (N choose k) is moderate (up to enum_max).
 - For large systems, use Burnside's lemma instead (see burnside.py).
 """
 
+import os
+import random
+import hashlib
+import shutil
+import tempfile
 import multiprocessing as mp
 from math import comb
-from itertools import islice, combinations
+import numpy as np
+from orderly_enum import enumerate_orderly
+from orbit_enum import enumerate_orbits
+from constrained_enum import enumerate_constrained
+from species_enum import enumerate_planes, multinomial
+from stabilizer_chain import stabilizer_chain, minimal_image
+from vector_enum import enumerate_numpy
+from bitset import to_words, site_masks, perm_luts, canonical_block, lex_order
+from burnside import burnside_count, species_count, orbit_counts, degeneracy_histogram
+from config_store import (UniqueConfigs, Checkpoint, to_run, gather, collect, write_run,
+                          external_merge, open_store, init_worker, worker_perms, worker_table,
+                          worker_masks)
+
+METHODS = ('sweep', 'orderly', 'numpy', 'revolving', 'chain', 'orbits')
+
+RESULT_CACHE_SIZE = 16  # number of (sites, group, k) results kept in memory
+_RESULT_CACHE = {}      # {((N, perm_tuples), k or composition): degeneracy_dict}, oldest first
+
+UNITS_PER_PROCESS = 32  # work units handed out per worker, for load balancing
+MIN_UNIT_SIZE = 20_000  # smallest number of combinations worth a work unit
+COMPLEMENT_CHUNK = 1 << 22  # configurations complemented at a time out of core
 
 def chunk_indices(total, n_chunks):
     """
@@ -33,6 +60,129 @@ def chunk_indices(total, n_chunks):
         stop  = (i + 1) * chunk if i < n_chunks - 1 else total
         yield (start, stop)
 
+def work_units(total, n_procs):
+    """
+    Divides a total number of combinations into many small work units
+    (UNITS_PER_PROCESS per process, each at least MIN_UNIT_SIZE), so that a slow or
+    busy worker only delays its current unit instead of a whole 1/n_procs share.
+
+    Yields:
+        (start, stop) pairs giving the slice indices for each unit.
+    """
+    n_units = min(n_procs * UNITS_PER_PROCESS, -(-total // MIN_UNIT_SIZE))
+    yield from chunk_indices(total, max(1, n_units))
+
+def _unrank_combination(rank: int, N: int, k: int) -> list[int]:
+    """
+    Returns the combination at position `rank` in the lexicographic order used by
+    itertools.combinations(range(N), k), via the combinatorial number system.
+
+    Parameters:
+        rank: Index of the combination (0 <= rank < N choose k).
+        N:    Number of sites.
+        k:    Number of chosen sites.
+
+    Returns:
+        Sorted list of the k chosen site indices.
+    """
+    combi = []
+    x = 0
+    for i in range(k):
+        # Skip whole blocks of combinations whose i-th element is x
+        block = comb(N - x - 1, k - i - 1)
+        while rank >= block:
+            rank -= block
+            x += 1
+            block = comb(N - x - 1, k - i - 1)
+        combi.append(x)
+        x += 1
+    return combi
+
+def _next_combination(combi: list[int], N: int) -> bool:
+    """
+    Advances `combi` in place to its lexicographic successor.
+
+    Returns:
+        False if `combi` was already the last combination, True otherwise.
+    """
+    k = len(combi)
+    i = k - 1
+    while i >= 0 and combi[i] == N - k + i:
+        i -= 1
+    if i < 0:
+        return False
+    combi[i] += 1
+    for j in range(i + 1, k):
+        combi[j] = combi[j - 1] + 1
+    return True
+
+def _revolving_door_unrank(rank: int, N: int, k: int) -> list[int]:
+    """
+    Returns the combination at position `rank` in revolving-door order.
+
+    The order is defined recursively as R(N, k) = R(N-1, k) followed by the reverse of
+    R(N-1, k-1) with site N-1 added, so consecutive combinations differ by one site
+    leaving and one site entering.
+
+    Returns:
+        Sorted list of the k chosen site indices.
+    """
+    combi = []
+    n, t = N, k
+    while 0 < t < n:
+        if rank < comb(n - 1, t):
+            n -= 1
+        else:
+            combi.append(n - 1)
+            rank = comb(n, t) - 1 - rank
+            n -= 1
+            t -= 1
+    combi.extend(reversed(range(t)))
+    return combi[::-1]
+
+def _revolving_door_successor(c: list[int], k: int):
+    """
+    Advances `c` in place to its successor in revolving-door order
+    (Knuth, TAOCP 7.2.1.3, Algorithm R).
+
+    Parameters:
+        c: Sorted list of the k chosen sites followed by the sentinel N (length k + 1).
+        k: Number of chosen sites.
+
+    Returns:
+        (removed_site, added_site), or None if `c` was the last combination.
+    """
+    if k == 0:
+        return None
+    if k & 1:
+        if c[0] + 1 < c[1]:
+            c[0] += 1
+            return c[0] - 1, c[0]
+        decrease = True
+    else:
+        if c[0] > 0:
+            c[0] -= 1
+            return c[0] + 1, c[0]
+        decrease = False
+    j = 2
+    while j <= k:
+        if decrease:
+            # Here c_j == c_{j-1} + 1: try to decrease c_j
+            if c[j - 1] >= j:
+                removed = c[j - 1]
+                c[j - 1] = c[j - 2]
+                c[j - 2] = j - 2
+                return removed, j - 2
+        else:
+            # Here c_{j-1} == j - 2: try to increase c_j
+            if c[j - 1] + 1 < c[j]:
+                c[j - 2] = c[j - 1]
+                c[j - 1] += 1
+                return j - 2, c[j - 1]
+        j += 1
+        decrease = not decrease
+    return None
+
 def _apply_perm_bits(bitvec: int, perm: tuple[int, ...]) -> int:
     """
     Applies a permutation to a bitvector.
@@ -71,58 +221,556 @@ def _worker(task):
     Worker function for parallel enumeration.
 
     Parameters:
-        task: (start, stop, k, N, perm_tuples)
+        task: (start, stop, k, N)
               start, stop: slice of combinations to enumerate.
               k: number of Br atoms.
               N: number of sites.
-              perm_tuples: list of symmetry permutations.
+        The symmetry permutations are set once per process by config_store.init_worker.
 
     Returns:
-        Dictionary mapping canonical bitvector (int) to degeneracy (int).
+        Sorted (canonical bitvectors, counts) arrays (see config_store.to_run).
     """
-    start, stop, k, N, perm_tuples = task
+    start, stop, k, N = task
+    perm_tuples = worker_perms()
     seen = {}
-    # Use islice to enumerate just the slice [start, stop) of combinations
-    for combi in islice(combinations(range(N), k), start, stop):
+    if start >= stop:
+        return to_run(seen, N)
+    # Jump straight to the first combination of the slice [start, stop)
+    combi = _unrank_combination(start, N, k)
+    for _ in range(stop - start):
         bitvec = 0
         for idx in combi:
             bitvec |= 1 << idx
         canon = _canonical_int(bitvec, perm_tuples)
         seen[canon] = seen.get(canon, 0) + 1
-    return seen
+        _next_combination(combi, N)
+    return to_run(seen, N)
+
+def _revolving_worker(task):
+    """
+    Worker function for parallel enumeration in revolving-door order.
+
+    The images of the current configuration under all permutations are kept live:
+    each step swaps one site out and one site in, so every image is updated with
+    a single XOR instead of being recomputed from scratch.
+
+    Parameters:
+        task: (start, stop, k, N), as in _worker.
+
+    Returns:
+        Same as _worker.
+    """
+    start, stop, k, N = task
+    seen = {}
+    if start >= stop:
+        return to_run(seen, N)
+    masks = worker_masks()
+    c = _revolving_door_unrank(start, N, k) + [N]
+    bitvec = 0
+    for idx in c[:k]:
+        bitvec |= 1 << idx
+    images = [sum(m[idx] for idx in c[:k]) for m in masks]
+    for _ in range(stop - start):
+        canon = min(images)
+        if bitvec < canon:
+            canon = bitvec
+        seen[canon] = seen.get(canon, 0) + 1
+        step = _revolving_door_successor(c, k)
+        if step is None:
+            break
+        a, b = step
+        bitvec ^= (1 << a) | (1 << b)
+        images = [img ^ m[a] ^ m[b] for img, m in zip(images, masks)]
+    return to_run(seen, N)
+
+def _chain_worker(task):
+    """
+    Worker function for parallel enumeration with the stabilizer-chain canonical form
+    (see stabilizer_chain.py): same sweep as _worker, but each canonical form costs
+    the sum of the transversal sizes of the group instead of its order.
+
+    Parameters:
+        task: (start, stop, k, N), as in _worker.
+
+    Returns:
+        Same as _worker.
+    """
+    start, stop, k, N = task
+    seen = {}
+    if start >= stop:
+        return to_run(seen, N)
+    chain = worker_table('stabilizer_chain', lambda perms: stabilizer_chain(perms, N))
+    combi = _unrank_combination(start, N, k)
+    for _ in range(stop - start):
+        bitvec = 0
+        for idx in combi:
+            bitvec |= 1 << idx
+        canon = minimal_image(bitvec, chain)
+        seen[canon] = seen.get(canon, 0) + 1
+        _next_combination(combi, N)
+    return to_run(seen, N)
+
+def _canonical_complements(keys, N, luts):
+    """
+    Canonical forms of the complements of a block of keys (uint64 bitvectors, or rows
+    of words beyond 64 sites), and the order that sorts them.
+    """
+    full = (1 << N) - 1
+    if keys.ndim == 1:
+        canon = canonical_block(keys ^ np.uint64(full), luts)
+        return canon, np.argsort(canon)
+    canon = canonical_block(keys ^ to_words([full], keys.shape[1])[0], luts)
+    return canon, lex_order(canon)
+
+def complement_configs(uniq_dict, N, permutations):
+    """
+    Maps unique configurations with k I atoms to those with N - k I atoms
+    by swapping Br and I on every site.
+
+    The complement of an orbit is an orbit, but the minimum of the complemented
+    orbit is not the complement of the minimum, so each complemented representative
+    is canonicalized again.
+
+    Parameters:
+        uniq_dict:    Unique configurations for k I atoms: UniqueConfigs
+                      or {canonical_bitvector (int): degeneracy (int)}.
+        N:            Number of sites.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+
+    Returns:
+        Unique configurations for N - k I atoms, of the same type as `uniq_dict`.
+    """
+    full = (1 << N) - 1
+    perm_tuples = [tuple(p) for p in permutations]
+    if isinstance(uniq_dict, UniqueConfigs):
+        canon, order = _canonical_complements(uniq_dict.keys_array, N,
+                                              perm_luts(perm_tuples, N))
+        # Complementing maps orbits one-to-one, so only the order changes
+        return UniqueConfigs(canon[order], uniq_dict.degeneracies[order])
+    return {_canonical_int(full ^ c, perm_tuples): d for c, d in uniq_dict.items()}
 
-def enumerate_unique(N, k, permutations, enum_max=30_000_000):
+def complement_store(store, N, permutations, out_path):
+    """
+    Out-of-core version of complement_configs: maps an on-disk store with k I atoms
+    to an on-disk store with N - k I atoms at `out_path`.
+
+    The store is complemented in chunks; each re-canonicalized chunk is sorted and
+    spilled as a run, and the runs are combined by an external merge.
+
+    Returns:
+        Memory-mapped UniqueConfigs for N - k I atoms.
+    """
+    luts = perm_luts([tuple(p) for p in permutations], N)
+    spill_dir = tempfile.mkdtemp(prefix='runs_', dir=os.path.dirname(os.path.abspath(out_path)))
+    try:
+        paths = []
+        for i in range(0, len(store), COMPLEMENT_CHUNK):
+            canon, order = _canonical_complements(
+                np.asarray(store.keys_array[i:i + COMPLEMENT_CHUNK]), N, luts)
+            paths.append(os.path.join(spill_dir, f"{len(paths)}.run"))
+            write_run((canon[order], np.asarray(store.degeneracies[i:i + COMPLEMENT_CHUNK])[order]),
+                      paths[-1])
+        external_merge(paths, out_path, N=N)
+    finally:
+        shutil.rmtree(spill_dir, ignore_errors=True)
+    return open_store(out_path, N)
+
+def sample_unique(N, k, permutations, n_samples, seed=None):
+    """
+    Draws unique configurations with k I atoms uniformly at random over the orbits
+    (not over the raw combinations), without enumerating.
+
+    A uniformly random combination S is accepted with probability |Stab(S)| / |G|.
+    An orbit holds |G| / |Stab| combinations, so every orbit is accepted with the same
+    probability, and on average about (N choose k) / (number of orbits), i.e. roughly |G|,
+    combinations are drawn per sample: the time is proportional to n_samples.
+
+    Parameters:
+        N:            Number of sites.
+        k:            Number of I atoms.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        n_samples:    Number of configurations to draw (independently, so an orbit
+                      can be drawn more than once).
+        seed:         Seed of the random generator (default: None, not reproducible).
+
+    Returns:
+        List of n_samples (canonical_bitvector (int), degeneracy (int)) pairs.
+    """
+    perm_tuples = [tuple(p) for p in permutations]
+    masks = site_masks(perm_tuples, N)
+    order = len(perm_tuples)
+    rng = random.Random(seed)
+    samples = []
+    while len(samples) < n_samples:
+        sites = rng.sample(range(N), k)
+        bitvec = sum(1 << j for j in sites)
+        images = [sum(m[j] for j in sites) for m in masks]
+        stabilizer = images.count(bitvec)
+        if rng.random() * order < stabilizer:
+            samples.append((min(min(images), bitvec), order // stabilizer))
+    return samples
+
+def clear_result_cache():
+    """
+    Empties the in-process result cache (e.g. to time enumerations).
+    """
+    _RESULT_CACHE.clear()
+
+def _cache_store(key, value):
+    """
+    Stores a result in _RESULT_CACHE, evicting the oldest entries beyond RESULT_CACHE_SIZE.
+    """
+    _RESULT_CACHE[key] = value
+    while len(_RESULT_CACHE) > RESULT_CACHE_SIZE:
+        del _RESULT_CACHE[next(iter(_RESULT_CACHE))]
+
+class EnumerationEngine:
+    """
+    Reusable enumeration engine for one site set and symmetry group.
+
+    The engine owns a persistent process pool whose workers receive the permutation
+    table once (through the pool initializer), so repeated queries pay only for
+    the combinatorics. Use it as a context manager, or call close() when done.
+
+    Parameters:
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        sphere:       Integer ID of the site set, used for the Burnside cache (default 1).
+        processes:    Number of worker processes (default: number of CPUs).
+        cache:        Optional config_store.ResultCache: in-memory results are also
+                      looked up in and saved to this on-disk cache, so they survive
+                      the process (default: None).
+    """
+
+    def __init__(self, permutations, sphere=1, processes=None, cache=None):
+        self.perm_tuples = [tuple(p) for p in permutations]
+        self.N = len(self.perm_tuples[0])
+        self.sphere = sphere
+        self.processes = processes
+        self.cache = cache
+        self._pool = None
+
+    @property
+    def group_id(self):
+        """Short digest of the permutation table, naming the files of this engine."""
+        return hashlib.sha1(repr(self.perm_tuples).encode()).hexdigest()[:12]
+
+    @property
+    def pool(self):
+        """The worker pool, started on first use."""
+        if self._pool is None:
+            self._pool = mp.Pool(self.processes, initializer=init_worker,
+                                 initargs=(self.perm_tuples,))
+        return self._pool
+
+    def _run(self, k, method, out_path=None, state_dir=None, resume=False):
+        """
+        Runs the enumeration of method `method` on the pool (no limits, no caching),
+        out of core into `out_path` if given, checkpointed to `state_dir` if given.
+        """
+        N = self.N
+        checkpoint = self._checkpoint(k, method, state_dir, resume)
+        if method == 'orderly':
+            return enumerate_orderly(N, k, self.perm_tuples, pool=self.pool,
+                                     out_path=out_path, checkpoint=checkpoint)
+        if method == 'orbits':
+            return enumerate_orbits(N, k, self.perm_tuples, pool=self.pool,
+                                    out_path=out_path, checkpoint=checkpoint)
+        if method == 'numpy':
+            return enumerate_numpy(N, k, self.perm_tuples, pool=self.pool,
+                                   out_path=out_path, checkpoint=checkpoint)
+
+        nprocs = self.processes or mp.cpu_count()
+        worker = {'revolving': _revolving_worker, 'chain': _chain_worker}.get(method, _worker)
+        tasks  = [(start, stop, k, N) for start, stop in work_units(comb(N, k), nprocs)]
+
+        # Merge partial results as the work units complete, in any order
+        return gather(self.pool, worker, tasks, N, out_path, checkpoint)
+
+    def _checkpoint(self, k, method, state_dir, resume):
+        """
+        Checkpoint of the job (k, method) in `state_dir`, or None if not checkpointing.
+        Each job gets its own subdirectory, named after sites, k, method and group.
+        """
+        if state_dir is None:
+            return None
+        group = self.group_id
+        job = {'N': self.N, 'k': k, 'method': method, 'group': group}
+        directory = os.path.join(state_dir, f"N{self.N}_k{k}_{method}_{group}")
+        return Checkpoint(directory, job, resume)
+
+    def store_path(self, out_dir, k):
+        """
+        Path of the on-disk store for k I atoms in `out_dir`, named after sites, k
+        and group, so stores of different groups can share a directory.
+        """
+        return os.path.join(out_dir, f"unique_N{self.N}_k{k}_{self.group_id}.bin")
+
+    def index(self, k, out_dir, method='sweep', state_dir=None, resume=False):
+        """
+        Persistent rank/unrank index of the unique configurations with k I atoms:
+        the on-disk store in `out_dir`, enumerated out of core (without limit) only
+        if it does not exist yet. Use at(i) / slice(a, b) on the result to page
+        through the configurations without reading the rest.
+
+        Returns:
+            Memory-mapped UniqueConfigs.
+        """
+        path = self.store_path(out_dir, k)
+        if os.path.exists(path):
+            return open_store(path, self.N)
+        return self.enumerate(k, float('inf'), method, out_dir, state_dir, resume)[0]
+
+    def enumerate(self, k, enum_max=30_000_000, method='sweep', out_dir=None,
+                  state_dir=None, resume=False):
+        """
+        Enumerate the unique configurations with k I atoms.
+        Same parameters and return value as enumerate_unique.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown enumeration method '{method}'")
+        N = self.N
+        if not 0 <= k <= N:
+            # No way to place k atoms on N sites (the mirrored k would be negative)
+            return collect([], N), 0
+        total = comb(N, k)
+        size = total // len(self.perm_tuples) if method in ('orderly', 'orbits') else total
+        if size > enum_max:
+            return None, total
+
+        if out_dir is not None:
+            os.makedirs(out_dir, exist_ok=True)
+            if k > N - k:
+                mirrored = self._run(N - k, method, self.store_path(out_dir, N - k),
+                                     state_dir, resume)
+                return complement_store(mirrored, N, self.perm_tuples,
+                                        self.store_path(out_dir, k)), total
+            return self._run(k, method, self.store_path(out_dir, k), state_dir, resume), total
+
+        result = self._lookup(k)
+        if result is not None:
+            return result, total
+
+        if k > N - k:
+            mirrored = self._lookup(N - k)
+            if mirrored is None:
+                mirrored = self._run(N - k, method, state_dir=state_dir, resume=resume)
+                self._remember(N - k, mirrored)
+            result = complement_configs(mirrored, N, self.perm_tuples)
+        else:
+            result = self._run(k, method, state_dir=state_dir, resume=resume)
+        self._remember(k, result)
+        return result, total
+
+    def enumerate_species(self, composition, enum_max=30_000_000, method='sweep'):
+        """
+        Enumerate the unique configurations with several species, composition[s] sites
+        holding species s, as packed bitplanes (see species_enum.py).
+
+        The composition with the last two species merged is enumerated first (down to
+        two species, with `method`), and the sites of species c - 2 are then placed on
+        the free sites of each of its unique configurations. All levels are kept in
+        the result caches, so e.g. the Cl/Br/I compositions with the same number of I
+        share one I/rest enumeration.
+
+        Returns:
+            (degeneracy_dict, total_combinations) as enumerate, with packed keys and
+            the multinomial number of configurations; (None, total) above enum_max.
+        """
+        composition = tuple(composition)
+        if sum(composition) != self.N or min(composition) < 0:
+            raise ValueError(f"Composition {composition} is not a split of {self.N} sites")
+        if len(composition) == 2:
+            return self.enumerate(composition[0], enum_max, method)
+        total = multinomial(composition)
+        if total > enum_max:
+            return None, total
+        key = ((self.N, tuple(self.perm_tuples)), composition)
+        if key in _RESULT_CACHE:
+            return _RESULT_CACHE[key], total
+        coarse, _ = self.enumerate_species(composition[:-2] + (sum(composition[-2:]),),
+                                           float('inf'), method)
+        result = enumerate_planes(self.N, composition, self.perm_tuples, coarse, pool=self.pool)
+        _cache_store(key, result)
+        return result, total
+
+    def count_species(self, composition):
+        """
+        Number of unique configurations with several species (see enumerate_species),
+        from the multinomial cycle index.
+        """
+        return species_count(tuple(composition), sphere=self.sphere, perms=self.perm_tuples,
+                             group_order=len(self.perm_tuples))
+
+    def enumerate_constrained(self, k, constraints, enum_max=30_000_000):
+        """
+        Enumerate the unique configurations with k I atoms that satisfy `constraints`
+        (a constrained_enum.Constraints), up to the operations that preserve them.
+        The limit applies to the estimated number of unique configurations, as for
+        method='orderly'. Results are not cached.
+
+        Returns:
+            (degeneracy_dict, total_combinations) as enumerate, total_combinations
+            counting the combinations that respect the fixed sites.
+        """
+        constraints.check(self.N)
+        total = constraints.total(self.N, k)
+        if total // len(self.perm_tuples) > enum_max:
+            return None, total
+        return enumerate_constrained(self.N, k, self.perm_tuples, constraints,
+                                     pool=self.pool), total
+
+    def _lookup(self, k):
+        """
+        Cached result for k I atoms, from memory or else from the on-disk cache, or None.
+        """
+        key = ((self.N, tuple(self.perm_tuples)), k)
+        if key in _RESULT_CACHE:
+            return _RESULT_CACHE[key]
+        if self.cache is None:
+            return None
+        result = self.cache.get(f"N{self.N}_k{k}_{self.group_id}", self.N)
+        if result is not None:
+            _cache_store(key, result)
+        return result
+
+    def _remember(self, k, result):
+        """
+        Stores the result for k I atoms in memory and in the on-disk cache.
+        """
+        _cache_store(((self.N, tuple(self.perm_tuples)), k), result)
+        if self.cache is not None:
+            self.cache.put(f"N{self.N}_k{k}_{self.group_id}", result)
+
+    def count(self, k):
+        """
+        Number of unique configurations with k I atoms, by Burnside's lemma.
+        """
+        return burnside_count(self.N, k, sphere=self.sphere, perms=self.perm_tuples,
+                              group_order=len(self.perm_tuples))
+
+    def degeneracies(self, k):
+        """
+        Number of unique configurations with k I atoms per degeneracy,
+        {degeneracy: count}, from the subgroup lattice (no enumeration).
+        """
+        return degeneracy_histogram(self.N, k, self.perm_tuples)
+
+    def sample(self, k, n_samples, seed=None):
+        """
+        Draws n_samples unique configurations with k I atoms uniformly over the orbits,
+        as (canonical_bitvector, degeneracy) pairs (see sample_unique).
+        """
+        return sample_unique(self.N, k, self.perm_tuples, n_samples, seed)
+
+    def count_all(self):
+        """
+        Number of unique configurations for every k = 0..N (list), by Burnside's lemma.
+        """
+        return orbit_counts(self.sphere, self.perm_tuples, len(self.perm_tuples))
+
+    def close(self):
+        """Shuts down the worker pool."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def enumerate_unique(N, k, permutations, enum_max=30_000_000, method='sweep', out_dir=None,
+                     state_dir=None, resume=False, cache=None, constraints=None):
     """
     Enumerate all unique (up to symmetry) Br/I configurations for k I on N sites.
 
+    For k > N/2 the N - k problem (placing Br instead of I) is solved and mapped
+    back by complement. Results are kept in an in-process cache, so a repeated
+    query, or its mirrored k, is served without enumerating again.
+    For repeated queries on the same site set, keep an EnumerationEngine instead,
+    which also reuses its worker pool.
+
     Parameters:
         N:           Number of sites.
         k:           Number of I atoms.
         permutations: List of symmetry permutations (as lists/tuples of indices).
         enum_max:    Maximum allowed total combinations before switching to fallback.
+                     For method='orderly' and 'orbits' the limit applies to the
+                     estimated number of unique configurations (total / |G|), since
+                     that is roughly what these searches visit.
+        method:      'sweep' canonicalizes every combination (default),
+                     'orderly' builds the canonical representatives directly
+                     (see orderly_enum.py), 'numpy' canonicalizes blocks of
+                     combinations with lookup tables (see vector_enum.py),
+                     'revolving' sweeps in revolving-door order and updates the
+                     permuted images incrementally, 'chain' sweeps with the
+                     stabilizer-chain canonical form, for large groups
+                     (see stabilizer_chain.py), 'orbits' enumerates the site
+                     orbits one after the other under stabilizer subgroups
+                     (see orbit_enum.py).
+        out_dir:     If given, enumerate out of core: workers spill sorted
+                     runs to disk and an external merge writes the final store to
+                     out_dir/unique_N{N}_k{k}_{group}.bin, group being a digest of the
+                     permutation table (for k > N/2 the mirrored store is written
+                     as well). Results are not kept in the memory cache.
+        state_dir:   If given, the partial result of every completed work unit
+                     is saved to a job subdirectory of state_dir as soon as it arrives.
+        resume:      If True, continue the job found in state_dir, skipping the work
+                     units already completed there.
+        cache:       Optional config_store.ResultCache, consulted before enumerating
+                     and filled afterwards (in-memory results only).
+        constraints: Optional constrained_enum.Constraints: only the configurations
+                     that satisfy them are built, by orderly generation pruned by the
+                     constraints, up to the operations that preserve them (see
+                     constrained_enum.py), and total_combinations counts the combinations
+                     that respect the fixed sites. In memory only; method and cache are
+                     not used.
 
     Returns:
         (degeneracy_dict, total_combinations)
-          - degeneracy_dict: {canonical_bitvector (int): degeneracy (int)}
+          - degeneracy_dict: {canonical_bitvector (int): degeneracy (int)} mapping,
+            a compact, array-backed UniqueConfigs view (see config_store.py; beyond
+            64 sites the bitvectors are stored as multi-word rows, see bitset.py),
+            memory-mapped from the on-disk store when out_dir is given
           - total_combinations: Total number of configurations (N choose k)
         If total combinations > enum_max, returns (None, total_combinations).
+        For k outside 0..N, there is no configuration: the mapping is empty and the
+        total 0.
     """
-    total = comb(N, k)
-    nprocs = mp.cpu_count()
-    chunks = list(chunk_indices(total, nprocs))
-    if total > enum_max:
-        return None, total         
+    if constraints is not None and (out_dir is not None or state_dir is not None):
+        raise ValueError("Constrained enumeration runs in memory only")
+    with EnumerationEngine(permutations, cache=cache) as engine:
+        if constraints is not None:
+            return engine.enumerate_constrained(k, constraints, enum_max)
+        return engine.enumerate(k, enum_max, method, out_dir, state_dir, resume)
 
-    # Store each permutation as a tuple of indices
-    perm_tuples = [tuple(p) for p in permutations]
+def enumerate_species(N, composition, permutations, enum_max=30_000_000, method='sweep',
+                      cache=None, sphere=1):
+    """
+    Enumerate all unique configurations with several species (e.g. Cl/Br/I) on N sites,
+    composition[s] sites holding species s (see EnumerationEngine.enumerate_species).
 
-    tasks  = [(start, stop, k, N, perm_tuples) for start, stop in chunks]
-    with mp.Pool() as pool:
-        parts = pool.map(_worker, tasks)
+    Parameters:
+        N:           Number of sites.
+        composition: Number of sites of every species (tuple of int, summing to N).
+                     Species c - 1 fills the sites not given to the others.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        enum_max:    Maximum allowed total (multinomial) combinations.
+        method:      Enumeration method of the two-species level (see enumerate_unique).
+        cache:       Optional config_store.ResultCache for the two-species level.
+        sphere:      Integer ID of the site set, used for the Burnside cache (default 1).
 
-    # Merge dictionaries from all processes
-    merged = {}
-    for d in parts:
-        for k_, v_ in d.items():
-            merged[k_] = merged.get(k_, 0) + v_
-    return merged, total
+    Returns:
+        (degeneracy_dict, total_combinations)
+          - degeneracy_dict: {canonical packed key (int): degeneracy (int)} mapping,
+            plane s of the key (bits s N .. s N + N - 1) holding the sites of species s
+            (see species_enum.species_of)
+          - total_combinations: Multinomial number of configurations
+        If total combinations > enum_max, returns (None, total_combinations).
+    """
+    if len(permutations[0]) != N:
+        raise ValueError(f"Permutations act on {len(permutations[0])} sites, not {N}")
+    with EnumerationEngine(permutations, sphere=sphere, cache=cache) as engine:
+        return engine.enumerate_species(composition, enum_max, method)
@@ -6,8 +6,12 @@ import time
 import sym_operations as sym
 import define_permutations as pr
 import visualize as vis
-from fast_enum import enumerate_unique
-from burnside import burnside_count, prepare_cycle_cache 
+from fast_enum import enumerate_unique, enumerate_species, sample_unique, METHODS
+from constrained_enum import Constraints, bonded_pairs
+from pair_energy import pair_weights, lowest_energies
+from burnside import (burnside_count, species_count, prepare_cycle_cache, degeneracy_histogram,
+                      get_cache_path, permutations_key)
+from config_store import ResultCache, CACHE_DIR, CACHE_BYTES
 import argparse
 
 ############################
@@ -40,13 +44,16 @@ coordinates_reduced_sphere = [
 
 ENUM_MAX = 30_000_000  # switch to Burnside above this many total configs
 
-def get_unique_configs(n_i, coords, perms, enum_max=ENUM_MAX, sphere=1):
+def get_unique_configs(n_i, coords, perms, enum_max=ENUM_MAX, sphere=1, method='sweep',
+                       out_dir=None, state_dir=None, resume=False, n_samples=0, seed=None,
+                       cache=None, constraints=None, n_cl=0, return_enumerated=False):
     """
     Enumerate unique configurations for placing `n_i` I atoms among the given coordinates,
     using symmetry operations specified by `perms`.
 
     Tries direct enumeration if the total number of configurations is less than `enum_max`.
-    If the enumeration would be too large, uses Burnside's lemma for counting only.
+    If the enumeration would be too large, uses Burnside's lemma for counting, and
+    optionally draws `n_samples` unique configurations uniformly at random.
 
     Parameters
     ----------
@@ -60,22 +67,80 @@ def get_unique_configs(n_i, coords, perms, enum_max=ENUM_MAX, sphere=1):
         Maximum number of configurations for explicit enumeration (default: 30,000,000).
     sphere : int, optional
         Sphere identifier, used for Burnside cache (default: 1).
+    method : str, optional
+        Enumeration method passed to `enumerate_unique`, one of `METHODS` (default: 'sweep').
+    out_dir : str, optional
+        If given, enumerate out of core and write the unique configurations to an
+        on-disk store in this directory (default: None, in memory).
+    state_dir : str, optional
+        If given, checkpoint completed work units to this directory (default: None).
+    resume : bool, optional
+        Skip the work units already completed in `state_dir` (default: False).
+    n_samples : int, optional
+        Number of unique configurations to draw at random when Burnside's lemma
+        is used (default: 0).
+    seed : int, optional
+        Seed for the random draws (default: None).
+    cache : ResultCache, optional
+        On-disk result cache consulted before enumerating, and filled afterwards
+        (default: None, no persistent cache).
+    constraints : Constraints, optional
+        Only enumerate the configurations that satisfy these constraints, up to the
+        symmetry operations that preserve them (default: None). Above `enum_max`
+        nothing is counted (Burnside's lemma does not apply) and n_unique is None.
+    n_cl : int, optional
+        Number of Cl atoms (default: 0). If nonzero, the configurations of `n_i` I,
+        `n_cl` Cl and Br on the other sites are enumerated, as packed keys holding an
+        I plane and a Cl plane (see species_enum.py); above `enum_max` they are only
+        counted, from the multinomial cycle index.
+    return_enumerated : bool, optional
+        If True, also return `enumerated` (default: False).
 
     Returns
     -------
-    uniq_dict : dict
-        Dictionary mapping canonical configuration to degeneracy, or empty if Burnside's lemma is used.
+    uniq_dict : Mapping
+        Mapping from canonical configuration to degeneracy (array-backed `UniqueConfigs`).
+        If Burnside's lemma is used, a dict of the distinct configurations
+        drawn at random (at most `n_samples`: the draws are independent, so an orbit
+        drawn twice appears once), empty by default.
     n_unique : int
         Number of unique configurations.
     n_total : int
         Total number of possible configurations.
+    enumerated : bool
+        Only returned if `return_enumerated` is True: True if `uniq_dict` holds all
+        the unique configurations, False if they were only counted (and possibly sampled).
     """
     n_sites = len(coords)
-    uniq_dict, n_total = enumerate_unique(n_sites, n_i, perms, enum_max)
-    if uniq_dict is None:  
-        n_unique = burnside_count(n_sites, n_i, sphere=sphere, perms=perms)
-        return {}, n_unique, n_total
-    n_unique = len(uniq_dict)
+    if n_cl:
+        composition = (n_i, n_cl, n_sites - n_i - n_cl)
+        uniq_dict, n_total = enumerate_species(n_sites, composition, perms, enum_max,
+                                               method=method, cache=cache, sphere=sphere)
+        enumerated = uniq_dict is not None
+        if enumerated:
+            n_unique = len(uniq_dict)
+        else:
+            uniq_dict, n_unique = {}, species_count(composition, sphere=sphere, perms=perms)
+    elif constraints is not None:
+        uniq_dict, n_total = enumerate_unique(n_sites, n_i, perms, enum_max,
+                                              constraints=constraints)
+        enumerated = uniq_dict is not None
+        if enumerated:
+            n_unique = len(uniq_dict)
+        else:
+            uniq_dict, n_unique = {}, None
+    else:
+        uniq_dict, n_total = enumerate_unique(n_sites, n_i, perms, enum_max, method=method,
+                                              out_dir=out_dir, state_dir=state_dir,
+                                              resume=resume, cache=cache)
+        enumerated = uniq_dict is not None
+        if enumerated:
+            n_unique = len(uniq_dict)
+        else:
+            n_unique = burnside_count(n_sites, n_i, sphere=sphere, perms=perms)
+            uniq_dict = dict(sample_unique(n_sites, n_i, perms, n_samples, seed))
+    if return_enumerated:
+        return uniq_dict, n_unique, n_total, enumerated
     return uniq_dict, n_unique, n_total
 
 if __name__ == "__main__":
@@ -84,13 +149,66 @@ if __name__ == "__main__":
     )
     parser.add_argument("--sphere", type=int, default=1, choices=[1,2,3],
                         help="Which sphere to use: 1=first, 2=second, 3=reduced (default: 1)")
+    parser.add_argument("--group", default="D4h", choices=sym.POINT_GROUPS,
+                        help="Point group of the site set, built from its generators; the "
+                             "sites must be symmetric under it (default: D4h)")
     parser.add_argument("--ni", type=int, default=2, help="Number of I atoms (default: 2)")
+    parser.add_argument("--ncl", type=int, default=0,
+                        help="Number of Cl atoms, for Cl/Br/I configurations (default: 0)")
     parser.add_argument("--enum-max", type=int, default=30_000_000,
                         help="Switch to Burnside above this number of configs (default: 30,000,000)")
+    parser.add_argument("--method", default="sweep", choices=METHODS,
+                        help="Enumeration method: sweep all combinations, orderly generation "
+                             "of canonical configurations only, NumPy-batched sweep, sweep in "
+                             "revolving-door order with incremental updates, sweep with a "
+                             "stabilizer-chain canonical form for large groups, or enumeration "
+                             "orbit by orbit of the sites (default: sweep)")
+    parser.add_argument("--out-dir", default=None,
+                        help="Enumerate out of core, spilling to disk and writing the unique "
+                             "configurations to a store in this directory (default: in memory)")
+    parser.add_argument("--state-dir", default=None,
+                        help="Checkpoint completed work units to this directory, so that an "
+                             "interrupted run can be resumed (default: no checkpoints)")
+    parser.add_argument("--resume", action='store_true',
+                        help="Resume the run checkpointed in --state-dir, skipping finished units.")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="Folder of the persistent result cache, so that repeated runs are "
+                             "not enumerated again (default: scripts/result_cache)")
+    parser.add_argument("--cache-size", type=float, default=CACHE_BYTES / 2**30,
+                        help="Size limit of the result cache in GB; the least recently used "
+                             f"results are evicted beyond it (default: {CACHE_BYTES / 2**30:g})")
+    parser.add_argument("--no-cache", action='store_true',
+                        help="Do not use the persistent result cache.")
+    parser.add_argument("--samples", type=int, default=0,
+                        help="Above --enum-max, draw this many unique configurations uniformly "
+                             "at random (default: 0)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for --samples (default: random)")
+    parser.add_argument("--fix-i", type=int, nargs="+", default=[], metavar="SITE",
+                        help="Sites (0-based) that must hold an I atom")
+    parser.add_argument("--fix-br", type=int, nargs="+", default=[], metavar="SITE",
+                        help="Sites (0-based) that must hold a Br atom")
+    parser.add_argument("--no-bonded-i", action='store_true',
+                        help="Forbid I atoms on two bonded sites (bonds as drawn in the SVGs)")
+    parser.add_argument("--top", type=int, default=0, metavar="K",
+                        help="Print the K unique configurations of lowest pair energy, with "
+                             "--j-ii and --j-bri on every bonded pair (default: 0, none)")
+    parser.add_argument("--j-ii", type=float, default=1.0,
+                        help="Energy of a bonded I-I pair for --top (default: 1.0)")
+    parser.add_argument("--j-bri", type=float, default=0.0,
+                        help="Energy of a bonded Br-I pair for --top (default: 0.0)")
     parser.add_argument("--save-svg", "-s", action='store_true',
                         help="Save each structure as an SVG in a folder.")
 
     args = parser.parse_args()
+    if args.resume and args.state_dir is None:
+        parser.error("--resume requires --state-dir")
+    constrained = args.fix_i or args.fix_br or args.no_bonded_i
+    if constrained and (args.out_dir or args.state_dir):
+        parser.error("--fix-i, --fix-br and --no-bonded-i run in memory only")
+    if args.ncl and (constrained or args.out_dir or args.state_dir or args.samples
+                     or args.top or args.save_svg):
+        parser.error("--ncl only supports in-memory enumeration and counting")
 
     SPHERE = args.sphere
     N_I = args.ni
@@ -104,42 +222,93 @@ if __name__ == "__main__":
         coordinates = coordinates_reduced_sphere
     else:
         raise ValueError("Sphere must be 1, 2 or 3")
+    if args.ncl and N_I + args.ncl > len(coordinates):
+        parser.error(f"--ni {N_I} and --ncl {args.ncl} do not fit on {len(coordinates)} sites")
 
-    start = time.time()
-    ops   = sym.D4h_symmetry_operations()
-    perms = list(pr.find_all_permutations(ops, coordinates).values())
+    constraints = None
+    if constrained:
+        forbidden = bonded_pairs(vis.get_connections(len(coordinates) + 1)) if args.no_bonded_i else ()
+        try:
+            constraints = Constraints(args.fix_i, args.fix_br, forbidden=forbidden)
+            constraints.check(len(coordinates))
+        except ValueError as e:
+            parser.error(str(e))
 
+    start = time.time()
     try:
-        _ = burnside_count(len(coordinates), 0, sphere=SPHERE)
-    except RuntimeError:
-        print(f"Burnside cache for sphere={SPHERE} not found. Creating it now...")
+        perms = pr.permutation_group(args.group, coordinates)
+    except ValueError as e:  # sites not symmetric under the chosen group
+        parser.error(str(e))
+
+    if not get_cache_path(SPHERE, permutations_key(perms)).exists():
+        print(f"Burnside cache for sphere={SPHERE} ({args.group}) not found. Creating it now...")
         prepare_cycle_cache(perms, sphere=SPHERE)
         print("...Burnside cache created!")
 
-    deg_dict, n_unique, n_total = get_unique_configs(
-        N_I, coordinates, perms, enum_max=ENUM_MAX, sphere=SPHERE
+    deg_dict, n_unique, n_total, enumerated = get_unique_configs(
+        N_I, coordinates, perms, enum_max=ENUM_MAX, sphere=SPHERE, method=args.method,
+        out_dir=args.out_dir, state_dir=args.state_dir, resume=args.resume,
+        n_samples=args.samples, seed=args.seed,
+        cache=None if args.no_cache else ResultCache(args.cache_dir, int(args.cache_size * 2**30)),
+        constraints=constraints, n_cl=args.ncl, return_enumerated=True
     )
 
     elapsed = time.time() - start
 
-    print(f"I atoms: {N_I} on {len(coordinates)} sites")
+    cl_atoms = f", Cl atoms: {args.ncl}" if args.ncl else ""
+    print(f"I atoms: {N_I}{cl_atoms} on {len(coordinates)} sites ({args.group}, order {len(perms)})")
+    if constraints is not None:
+        # Constrained configurations are only equivalent under the operations preserving them
+        print(f"Symmetry operations preserving the constraints: "
+              f"{len(constraints.subgroup(perms, len(coordinates)))}")
     print(f"Total configurations:  {n_total:,}")
-    print(f"Unique configurations: {n_unique:,}")
+    if n_unique is None:
+        print("Unique configurations: too many to enumerate under the constraints "
+              "(raise --enum-max)")
+    else:
+        print(f"Unique configurations: {n_unique:,}")
     print(f"Elapsed time: {elapsed:.2f} s")
+    if enumerated and args.out_dir:
+        print(f"Unique configurations stored in folder: {args.out_dir}")
+    if not enumerated and n_unique is not None and not args.ncl:
+        # Burnside tier: no configurations, but the orbit sizes are still known
+        print("Unique configurations per degeneracy:")
+        for degeneracy, count in degeneracy_histogram(len(coordinates), N_I, perms).items():
+            print(f"  {degeneracy:>4}: {count:,}")
+        if deg_dict:
+            # Independent draws: an orbit drawn more than once is kept once
+            print(f"Randomly drawn unique configurations: {len(deg_dict):,} distinct "
+                  f"in {args.samples:,} draws")
+
+    # === Lowest pair energies, if requested ===
+    if args.top and not deg_dict:
+        print("--top: no configurations to score (use --samples to score random draws, "
+              "or raise --enum-max)")
+    if deg_dict and args.top:
+        bonds = bonded_pairs(vis.get_connections(len(coordinates) + 1))
+        lowest = lowest_energies(deg_dict, len(coordinates),
+                                 pair_weights(bonds, len(coordinates), args.j_ii),
+                                 pair_weights(bonds, len(coordinates), args.j_bri), top_k=args.top)
+        print(f"Lowest pair energies (I-I {args.j_ii:g}, Br-I {args.j_bri:g} per bond):")
+        for energy, config_int, degeneracy in lowest:
+            sites = [i for i in range(len(coordinates)) if config_int >> i & 1]
+            print(f"  E = {energy:g}  deg {degeneracy}  I sites {sites}")
 
-    # === Save SVGs if requested and possible ===
+    # === Save SVGs if requested ===
     if deg_dict and args.save_svg:
-        structures = []
-        for idx, (config_int, degeneracy) in enumerate(deg_dict.items()):
-            bits = [(config_int >> i) & 1 for i in range(len(coordinates))]
-            symbols = ['I'] * (len(coordinates) + 1)
-            for i, b in enumerate(bits):
-                symbols[i + 1] = 'Br' if b else 'I'
-            title = f"Config {idx+1}: deg {degeneracy}"
-            full_coords = [[0, 0, 0]] + coordinates
-            structures.append((full_coords, symbols, title))
+        full_coords = [[0, 0, 0]] + coordinates
+
+        def structures():
+            # Generated while the SVGs are written, so no list of all structures is built
+            for idx, (config_int, degeneracy) in enumerate(deg_dict.items()):
+                bits = [(config_int >> i) & 1 for i in range(len(coordinates))]
+                symbols = ['I'] * (len(coordinates) + 1)
+                for i, b in enumerate(bits):
+                    symbols[i + 1] = 'Br' if b else 'I'
+                title = f"Config {idx+1}: deg {degeneracy}"
+                yield full_coords, symbols, title
 
         svg_dir = f"svg_configs_sphere{SPHERE}_I{N_I}_Br{len(coordinates)-N_I}"
         prefix = f"I{N_I}_Br{len(coordinates)-N_I}"
-        vis.save_structures_as_svgs(structures, svg_dir, prefix=prefix)
+        vis.save_structures_as_svgs(structures(), svg_dir, prefix=prefix)
         print(f"SVG images saved in folder: {svg_dir}")
@@ -0,0 +1,226 @@
+"""
+Script for the enumeration of unique Br/I configurations (up to symmetry)
+by decomposing the sites into their orbits under the group.
+
+The group maps every site orbit onto itself, so a configuration is a choice of
+k_1 sites in the first orbit, k_2 in the second, ..., with k_1 + k_2 + ... = k,
+and each composition (k_1, k_2, ...) can be enumerated on its own.
+
+This module:
+- Splits the sites into orbits, largest first.
+- Enumerates the choices in the first orbit under the whole group, on the orbit
+  alone: these small problems only depend on the group restricted to the orbit,
+  and are cached in the process building the work units, so they are shared
+  between compositions, and between the runs of one session on site sets that
+  have the same orbit (e.g. the 8-site orbit of the first sphere is the reduced sphere).
+- Extends each choice orbit by orbit, under the stabilizer of what was chosen so far:
+  only the choices that are minimal under that (usually small) subgroup are kept.
+  The partial configurations share a handful of stabilizers, so the choices of an
+  orbit under each stabilizer are worked out once per process and reused.
+- Canonicalizes the configurations of each task in one vectorized block.
+- Returns the same {canonical_bitvector: degeneracy} mapping as fast_enum,
+  with degeneracies computed as |G| / |Stab|.
+
+Instead of one sweep of N choose k combinations, the work is many small sweeps of
+|O| choose k_j combinations, each pruned by a stabilizer. This pays off when the
+sites split into several orbits and k is large: on the second sphere (D4h, six
+orbits, one process), 7 I take 15 s against 58 s for orderly_enum and 29 s for
+vector_enum, while for 5 I all three take about a second and vector_enum is the
+fastest.
+"""
+
+import multiprocessing as mp
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+import numpy as np
+from orderly_enum import UNITS_PER_PROCESS
+from bitset import to_words, to_ints, n_words, site_masks, image, canonical_block
+from config_store import to_run, run_tasks, worker_table, worker_masks, worker_luts
+
+MIN_UNITS = 64        # split each composition into at least this many work units, if possible
+BLOCK_SIZE = 1 << 18  # target number of configurations canonicalized per task
+
+def site_orbits(perm_tuples, N):
+    """
+    Returns the orbits of the sites under the group, as sorted lists of sites,
+    largest orbit first.
+    """
+    orbits = []
+    seen = set()
+    for i in range(N):
+        if i in seen:
+            continue
+        orbit = {p[i] for p in perm_tuples} | {i}
+        seen |= orbit
+        orbits.append(sorted(orbit))
+    return sorted(orbits, key=len, reverse=True)
+
+def _restriction(perm_tuples, orbit):
+    """
+    The group restricted to one site orbit, with the orbit sites relabeled 0..|O|-1:
+    a sorted tuple of distinct permutations.
+    """
+    local = {site: a for a, site in enumerate(orbit)}
+    return tuple(sorted({tuple(local[p[site]] for site in orbit) for p in perm_tuples}))
+
+@lru_cache(maxsize=256)
+def _orbit_choices(restricted, j):
+    """
+    Returns the canonical (minimum) bitvectors of all unique ways to choose j sites
+    of an orbit, under the group restricted to that orbit (see _restriction).
+    """
+    masks = site_masks(restricted, len(restricted[0]))
+    reps = set()
+    for combi in combinations(range(len(restricted[0])), j):
+        bitvec = sum(1 << a for a in combi)
+        reps.add(min(image(bitvec, m) for m in masks))
+    return tuple(sorted(reps))
+
+@lru_cache(maxsize=256)
+def _subsets(orbit, j):
+    """
+    Returns the bitvectors of all ways to choose j sites of an orbit (a tuple of sites).
+    """
+    return tuple(sum(1 << site for site in combi) for combi in combinations(orbit, j))
+
+def _compositions(k, sizes):
+    """
+    Yields all tuples (k_1, ..., k_r) with 0 <= k_j <= sizes[j] and sum k.
+    """
+    if not sizes:
+        if k == 0:
+            yield ()
+        return
+    rest = sum(sizes[1:])
+    for k1 in range(max(0, k - rest), min(k, sizes[0]) + 1):
+        for tail in _compositions(k - k1, sizes[1:]):
+            yield (k1,) + tail
+
+def _extend(partial, orbit, j, masks, steps):
+    """
+    Extends partial configurations by j sites of the next orbit.
+
+    Parameters:
+        partial: List of (bitvec, stabilizer) pairs, stabilizer holding the indices
+                 of the permutations that fix bitvec.
+        orbit:   Sites of the next orbit (a tuple).
+        j:       Number of I atoms on it.
+        masks:   Site masks of the whole group (see bitset.site_masks).
+        steps:   Dict caching the unique choices of j sites of an orbit under a
+                 stabilizer, {(orbit, j, stabilizer): [(choice, its stabilizer)]}:
+                 the partial configurations share a handful of stabilizers.
+
+    Returns:
+        List of the extended (bitvec, stabilizer) pairs, one per choice that is
+        unique under the stabilizer of the configuration it extends.
+    """
+    subsets = _subsets(orbit, j)
+    extended = []
+    for bits, stab in partial:
+        if len(stab) == 1:
+            # Only the identity is left: every choice is unique
+            extended.extend((bits | sub, stab) for sub in subsets)
+            continue
+        key = (orbit, j, stab)
+        if key not in steps:
+            choices = {min(image(sub, masks[g]) for g in stab) for sub in subsets}
+            steps[key] = [(sub, tuple(g for g in stab if image(sub, masks[g]) == sub))
+                          for sub in sorted(choices)]
+        extended.extend((bits | sub, sub_stab) for sub, sub_stab in steps[key])
+    return extended
+
+def _tasks(N, k, perm_tuples, orbits, min_units=MIN_UNITS):
+    """
+    Builds the work units. For each composition, the choices in the first orbit are
+    the cached orbit representatives (see _orbit_choices); the next orbits are filled
+    in here as long as the composition has fewer than `min_units` partial
+    configurations, so that no single unit holds most of the work.
+
+    Yields:
+        (composition, level, bitvec, stabilizer): bitvec holds the choices in the
+        first `level` orbits, stabilizer the indices of the permutations that fix it.
+    """
+    masks = site_masks(perm_tuples, N)
+    steps = {}
+    restricted = _restriction(perm_tuples, orbits[0])
+    for composition in _compositions(k, [len(o) for o in orbits]):
+        partial = []
+        for local in _orbit_choices(restricted, composition[0]):
+            bitvec = sum(1 << site for a, site in enumerate(orbits[0]) if local >> a & 1)
+            stabilizer = tuple(g for g, m in enumerate(masks) if image(bitvec, m) == bitvec)
+            partial.append((bitvec, stabilizer))
+        level = 1
+        while len(partial) < min_units and level < len(orbits):
+            partial = _extend(partial, tuple(orbits[level]), composition[level], masks, steps)
+            level += 1
+        for bitvec, stabilizer in partial:
+            yield composition, level, bitvec, stabilizer
+
+def _worker_orbits():
+    """
+    The site orbits of this worker process, built once.
+    """
+    return worker_table('site_orbits',
+                        lambda perms: [tuple(o) for o in site_orbits(perms, len(perms[0]))])
+
+def _worker(task):
+    """
+    Worker function for parallel orbit-by-orbit enumeration.
+
+    Parameters:
+        task: (units, N), units holding (composition, level, bitvec, stabilizer)
+              entries of _tasks.
+
+    Returns:
+        Sorted (canonical bitvectors, degeneracies) arrays (see config_store.to_run).
+    """
+    units, N = task
+    masks = worker_masks()
+    orbits = _worker_orbits()
+    steps = worker_table('orbit_steps', lambda perms: {})
+    partial = []
+    for composition, level, bitvec, stabilizer in units:
+        unit = [(bitvec, stabilizer)]
+        for orbit, j in zip(orbits[level:], composition[level:]):
+            unit = _extend(unit, orbit, j, masks, steps)
+        partial.extend(unit)
+    if not partial:
+        return to_run({}, N)
+
+    # Every partial configuration is now a distinct unique configuration:
+    # canonicalize those of all units in one vectorized block
+    luts = worker_luts()
+    if N > 64:
+        keys = to_ints(canonical_block(to_words([bits for bits, _ in partial], n_words(N)), luts))
+    else:
+        bits = np.array([bits for bits, _ in partial], dtype=np.uint64)
+        keys = canonical_block(bits, luts).tolist()
+    return to_run({key: len(masks) // len(stab) for key, (_, stab) in zip(keys, partial)}, N)
+
+def enumerate_orbits(N, k, permutations, pool=None, out_path=None, checkpoint=None):
+    """
+    Enumerate all unique (up to symmetry) Br/I configurations for k I on N sites,
+    orbit by orbit (see the module docstring).
+
+    Parameters:
+        N:            Number of sites.
+        k:            Number of I atoms.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        pool, out_path, checkpoint: See config_store.run_tasks.
+
+    Returns:
+        Mapping {canonical_bitvector (int): degeneracy (int)}, identical to the one
+        built by fast_enum.enumerate_unique.
+    """
+    perm_tuples = [tuple(p) for p in permutations]
+    orbits = site_orbits(perm_tuples, N)
+    # Deal the units round-robin into a few tasks per process (more for large cases,
+    # about BLOCK_SIZE unique configurations each), so that each task canonicalizes
+    # one large block instead of a handful of configurations
+    units = list(_tasks(N, k, perm_tuples, orbits))
+    n_blocks = comb(N, k) // len(perm_tuples) // BLOCK_SIZE
+    n_tasks = min(len(units), max(mp.cpu_count() * UNITS_PER_PROCESS, n_blocks))
+    tasks = [(units[i::n_tasks], N) for i in range(n_tasks)]
+    return run_tasks(_worker, tasks, N, perm_tuples, pool, out_path,
+                     checkpoint)
@@ -0,0 +1,166 @@
+"""
+Script for the enumeration of unique Br/I configurations (up to symmetry)
+by orderly generation, i.e. without sweeping all N choose k combinations.
+
+This module:
+- Builds configurations one I atom at a time, always adding a site with a larger
+  index than the ones already occupied.
+- Keeps only prefixes that are canonical, where canonical means lexicographically
+  smallest (as a sorted tuple of occupied sites) among all symmetry images.
+  Removing the largest site of a canonical set leaves a canonical set, so pruning
+  a non-canonical prefix never loses an orbit and every orbit is reached exactly once.
+- Keeps the images of the current prefix under every group operation up to date,
+  so each extension costs one OR per operation instead of a full permutation.
+- Optionally works under a subgroup and prunes the prefixes that break constraints
+  (the search behind constrained_enum.py).
+- Returns the same {canonical_bitvector: degeneracy} dictionary as fast_enum,
+  with degeneracies computed as |G| / |Stab|.
+
+The work scales with the number of unique configurations (roughly N choose k / |G|)
+instead of N choose k, which makes much larger cases reachable.
+"""
+
+import multiprocessing as mp
+from bitset import site_masks, popcount, is_lex_smaller
+from config_store import to_run, run_tasks, worker_masks
+
+UNITS_PER_PROCESS = 32  # target number of prefix subtrees per worker process
+
+def _children(bitvec, images, last, depth, k, N, masks, cons=None):
+    """
+    Yields the extensions (child, child_images, x) of a canonical prefix by one site
+    x that are canonical under `masks` and can still be completed into k sites.
+
+    With constraints `cons` (see constrained_enum.Constraints.compiled), only the
+    extensions that respect them and can still be completed into a valid
+    configuration are yielded, so whole subtrees are pruned.
+    """
+    stop = N - (k - depth) + 1  # leave room for the remaining k - depth - 1 sites
+    if cons is None:
+        for x in range(last + 1, stop):
+            child = bitvec | (1 << x)
+            child_images = [img | m[x] for img, m in zip(images, masks)]
+            if not any(is_lex_smaller(img, child) for img in child_images):
+                yield child, child_images, x
+        return
+    fixed_i, fixed_br, counts, adjacent = cons
+    missing = fixed_i & ~bitvec
+    if missing:
+        if popcount(missing) > k - depth:
+            return
+        # Sites are added in increasing order: the lowest missing fixed I cannot be skipped
+        stop = min(stop, (missing & -missing).bit_length())
+    for x in range(last + 1, stop):
+        if fixed_br >> x & 1 or adjacent[x] & bitvec:
+            continue
+        child = bitvec | (1 << x)
+        if any(popcount(child & mask) > n or
+               popcount(child & mask) + popcount(above[x]) < n
+               for mask, n, above in counts):
+            continue
+        child_images = [img | m[x] for img, m in zip(images, masks)]
+        if any(is_lex_smaller(img, child) for img in child_images):
+            continue
+        yield child, child_images, x
+
+def _grow(bitvec, images, last, depth, k, N, masks, seen, cons=None):
+    """
+    Depth-first extension of a canonical prefix, collecting canonical leaves in `seen`.
+
+    Parameters:
+        bitvec: Current prefix (int bitvector).
+        images: Images of the prefix under every group operation.
+        last:   Largest occupied site of the prefix (-1 if empty).
+        depth:  Number of occupied sites of the prefix.
+        k, N:   Target number of I atoms and number of sites.
+        masks:  Output of bitset.site_masks (for the group, or a subgroup of it).
+        seen:   Dictionary to fill with {canonical_bitvector: degeneracy}.
+        cons:   Optional constraints the leaves must satisfy (see _children).
+    """
+    if depth == k:
+        if cons is not None:
+            fixed_i, _, counts, _ = cons
+            if fixed_i & ~bitvec or any(popcount(bitvec & mask) != n for mask, n, _ in counts):
+                return
+        stab = sum(1 for img in images if img == bitvec)
+        seen[min(images)] = len(masks) // stab
+        return
+    for child, child_images, x in _children(bitvec, images, last, depth, k, N, masks, cons):
+        _grow(child, child_images, x, depth + 1, k, N, masks, seen, cons)
+
+def _prefixes(depth, k, N, masks, cons=None):
+    """
+    Returns all canonical prefixes (respecting `cons`, if given) with `depth` occupied
+    sites as (bitvec, images, last) tuples.
+    """
+    level = [(0, [0] * len(masks), -1)]
+    for d in range(depth):
+        level = [child for bitvec, images, last in level
+                 for child in _children(bitvec, images, last, d, k, N, masks, cons)]
+    return level
+
+def _worker(task):
+    """
+    Worker function for parallel orderly generation.
+
+    Parameters:
+        task: (prefix, depth, k, N, subgroup, cons)
+              prefix:   (bitvec, images, last) canonical prefix to extend.
+              depth:    Number of occupied sites in the prefix.
+              subgroup: Indices of the permutations to canonicalize under
+                        (None for the whole group).
+              cons:     Constraints of the leaves, or None (see _children).
+
+    Returns:
+        Sorted (canonical bitvectors, degeneracies) arrays (see config_store.to_run).
+    """
+    (bitvec, images, last), depth, k, N, subgroup, cons = task
+    masks = worker_masks()
+    if subgroup is not None:
+        masks = [masks[g] for g in subgroup]
+    seen = {}
+    _grow(bitvec, images, last, depth, k, N, masks, seen, cons)
+    return to_run(seen, N)
+
+def enumerate_orderly(N, k, permutations, split_depth=None, pool=None, out_path=None,
+                      checkpoint=None, subgroup=None, cons=None):
+    """
+    Enumerate all unique (up to symmetry) Br/I configurations for k I on N sites
+    by orderly generation.
+
+    Parameters:
+        N:            Number of sites.
+        k:            Number of I atoms.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        split_depth:  Prefix depth at which the search tree is split into parallel tasks.
+                      By default the depth grows until there are about
+                      UNITS_PER_PROCESS subtrees per process, for load balancing.
+        pool, out_path, checkpoint: See config_store.run_tasks.
+        subgroup:     Optional indices of the permutations to canonicalize under
+                      (default: all of them).
+        cons:         Optional constraints the configurations must satisfy
+                      (see constrained_enum.Constraints.compiled).
+
+    Returns:
+        Mapping {canonical_bitvector (int): degeneracy (int)}, identical to the one
+        built by fast_enum.enumerate_unique without subgroup and constraints.
+    """
+    perm_tuples = [tuple(p) for p in permutations]
+    masks = site_masks(perm_tuples, N)
+    if subgroup is not None:
+        masks = [masks[g] for g in subgroup]
+    if split_depth is None:
+        # Split the search tree until there are enough subtrees for load balancing
+        n_units = mp.cpu_count() * UNITS_PER_PROCESS
+        depth = 0
+        prefixes = _prefixes(depth, k, N, masks, cons)
+        while depth < k and 0 < len(prefixes) < n_units:
+            depth += 1
+            prefixes = _prefixes(depth, k, N, masks, cons)
+    else:
+        depth = min(k, split_depth)
+        prefixes = _prefixes(depth, k, N, masks, cons)
+
+    tasks = [(prefix, depth, k, N, subgroup, cons) for prefix in prefixes]
+    return run_tasks(_worker, tasks, N, perm_tuples, pool, out_path,
+                     checkpoint)
@@ -0,0 +1,108 @@
+"""
+Screening of unique Br/I configurations with a pairwise interaction model.
+
+The energy of a configuration with I occupations x_i (1 for I, 0 for Br) is
+
+    E = sum_{i<j} J_II[i, j] x_i x_j + J_BrI[i, j] (x_i (1 - x_j) + (1 - x_i) x_j)
+
+for symmetric weight matrices J_II and J_BrI over the sites (e.g. the bonds of
+visualize.get_connections, see pair_weights).
+
+This module:
+- Decodes blocks of canonical bitvectors (uint64 keys, or rows of words beyond 64 sites)
+  into 0/1 occupation matrices, and scores a whole block with two matrix products.
+- Streams over the result of fast_enum.enumerate_unique block by block (memory-mapped
+  stores included) and keeps only the top_k lowest energies in a heap, so no Python
+  objects are built for the other configurations.
+"""
+
+import heapq
+import numpy as np
+from bitset import WORD_BITS, n_words, to_words, to_ints
+from config_store import UniqueConfigs
+
+SCORE_BLOCK = 1 << 16  # configurations scored at a time
+ENERGY_DECIMALS = 9  # energies are compared after rounding, so float noise does not break ties
+
+def pair_weights(pairs, N, weight=1.0):
+    """
+    Symmetric (N, N) weight matrix with `weight` on every given pair of sites
+    (e.g. constrained_enum.bonded_pairs) and zero elsewhere.
+    """
+    J = np.zeros((N, N))
+    for i, j in pairs:
+        J[i, j] = J[j, i] = weight
+    return J
+
+def occupations(keys, N):
+    """
+    (n, N) float array of the I occupations (0/1) of a block of keys: a uint64 array,
+    or an (n, W) array of rows of words.
+    """
+    words = keys[:, None] if keys.ndim == 1 else keys
+    sites = np.arange(N)
+    shifts = (sites % WORD_BITS).astype(np.uint64)
+    return ((words[:, sites // WORD_BITS] >> shifts) & np.uint64(1)).astype(np.float64)
+
+def pair_energies(keys, N, j_ii, j_bri=None):
+    """
+    Energies of a block of keys (see occupations) under the pair model of the module
+    docstring, with (N, N) weight matrices j_ii and j_bri (zero diagonal).
+
+    Returns:
+        float array, one energy per key.
+    """
+    x = occupations(keys, N)
+    # Each unordered I-I pair appears twice in x J x
+    energies = 0.5 * np.einsum('bi,bi->b', x @ j_ii, x)
+    if j_bri is not None:
+        # Each Br-I pair appears once in x J (1 - x)
+        energies += np.einsum('bi,bi->b', x @ j_bri, 1.0 - x)
+    return energies
+
+def _blocks(configs, N):
+    """
+    Yields (keys, degeneracies) array blocks of SCORE_BLOCK configurations from
+    UniqueConfigs (read block by block) or any {bitvector: degeneracy} mapping.
+    """
+    if isinstance(configs, UniqueConfigs):
+        for i in range(0, len(configs), SCORE_BLOCK):
+            yield (np.asarray(configs.keys_array[i:i + SCORE_BLOCK]),
+                   np.asarray(configs.degeneracies[i:i + SCORE_BLOCK]))
+        return
+    items = list(configs.items())
+    W = n_words(N)
+    for i in range(0, len(items), SCORE_BLOCK):
+        keys, degeneracies = zip(*items[i:i + SCORE_BLOCK])
+        keys = np.array(keys, dtype=np.uint64) if W == 1 else to_words(keys, W)
+        yield keys, np.array(degeneracies)
+
+def lowest_energies(configs, N, j_ii, j_bri=None, top_k=10):
+    """
+    The top_k configurations of lowest pair energy (see pair_energies).
+    Equal energies (to ENERGY_DECIMALS decimals) are ranked by decreasing degeneracy,
+    i.e. by statistical weight.
+
+    Parameters:
+        configs: Unique configurations, as returned by fast_enum.enumerate_unique
+                 (UniqueConfigs or {canonical_bitvector: degeneracy}).
+        N:       Number of sites.
+        j_ii, j_bri: (N, N) weight matrices of the I-I and Br-I pairs (see pair_weights).
+        top_k:   Number of configurations to keep.
+
+    Returns:
+        List of (energy, canonical_bitvector, degeneracy) tuples, lowest energy first.
+    """
+    heap = []  # the kept configurations, worst (highest energy, lowest degeneracy) on top
+    for keys, degeneracies in _blocks(configs, N):
+        energies = np.round(pair_energies(keys, N, j_ii, j_bri), ENERGY_DECIMALS)
+        # Only the top_k best of a block can enter the heap
+        best = np.lexsort((-degeneracies.astype(np.int64), energies))[:top_k]
+        best_keys = keys[best].tolist() if keys.ndim == 1 else to_ints(keys[best])
+        for key, e, d in zip(best_keys, energies[best].tolist(), degeneracies[best].tolist()):
+            item = (-e, d, key)
+            if len(heap) < top_k:
+                heapq.heappush(heap, item)
+            elif item > heap[0]:
+                heapq.heapreplace(heap, item)
+    return [(-e, key, d) for e, d, key in sorted(heap, reverse=True)]
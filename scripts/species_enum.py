@@ -0,0 +1,179 @@
+"""
+Script for the enumeration of unique configurations with more than two species
+(e.g. Cl/Br/I) up to symmetry, with packed bitplanes.
+
+A configuration with c species is encoded as c - 1 bitplanes of N bits, plane s
+holding the sites of species s (the last species fills the remaining sites), packed
+into one key: key = plane_0 | plane_1 << N | ... | plane_{c-2} << (c-2) N.
+With two species the key is the usual bitvector of the I sites.
+
+This module:
+- Extends every permutation to the packed key (it acts on every plane the same way),
+  so all planes are canonicalized together, with the per-byte lookup tables of
+  vector_enum.py / bitset.py, as the minimum packed key over the group.
+- Builds the configurations of a composition (n_0, ..., n_{c-1}) from the unique
+  configurations of the coarser composition where the last two species are merged
+  (see fast_enum.EnumerationEngine.enumerate_species): for each coarse representative,
+  only the placements of species c - 2 on its free sites are swept. A unique
+  configuration met `count` times from a coarse representative of degeneracy `d`
+  has degeneracy count * d, so no symmetry work is redone between the levels.
+- Returns a {canonical_key: degeneracy} mapping (UniqueConfigs) like fast_enum.
+
+The number of unique configurations of any composition is given without
+enumeration by burnside.species_count.
+"""
+
+from math import comb, factorial
+import numpy as np
+from bitset import n_words, subsets_table, perm_luts, canonical_block, lex_order, run_starts
+from config_store import run_tasks, worker_table
+
+BLOCK_SIZE = 1 << 18  # target number of configurations per work unit
+
+def multinomial(composition):
+    """Number of configurations with the given number of sites per species."""
+    total = factorial(sum(composition))
+    for n in composition:
+        total //= factorial(n)
+    return total
+
+def packed_permutations(perm_tuples, N, n_planes):
+    """
+    Extends permutations of N sites to packed keys of n_planes bitplanes.
+    """
+    return [tuple(s * N + j for s in range(n_planes) for j in p) for p in perm_tuples]
+
+def species_of(key, N, n_species):
+    """
+    Decodes a packed key into the species index (0..n_species-1) of every site.
+    """
+    species = [n_species - 1] * N
+    for s in range(n_species - 1):
+        plane = key >> (s * N)
+        for i in range(N):
+            if plane >> i & 1:
+                species[i] = s
+    return species
+
+def _packed_luts(n_planes, N):
+    """
+    The lookup tables of this worker process for keys of n_planes planes, built once.
+    """
+    return worker_table(('packed_luts', n_planes),
+                        lambda perms: perm_luts(packed_permutations(perms, N, n_planes),
+                                                n_planes * N))
+
+def _deposit_luts(free, offset, W):
+    """
+    Per-byte lookup tables placing the bits of a local subset of `free` sites at the
+    sites they stand for, shifted by `offset` bits: uint64 array of shape
+    (n_bytes, 256, W), as bitset.perm_luts for one permutation.
+    """
+    n_bytes = (len(free) + 7) // 8
+    luts = np.zeros((n_bytes, 256, W), dtype=np.uint64)
+    values = np.arange(256)
+    for j, site in enumerate(free):
+        b, r = divmod(j, 8)
+        w, s = divmod(offset + site, 64)
+        luts[b, ((values >> r) & 1).astype(bool), w] |= np.uint64(1 << s)
+    return luts
+
+def _worker(task):
+    """
+    Worker function for parallel multi-species enumeration.
+
+    Parameters:
+        task: (items, N, n_planes, n), items being (coarse_key, degeneracy, start, stop)
+              tuples: the placements start..stop-1 of n sites of the last plane on the
+              free sites of the coarse configuration coarse_key.
+
+    Returns:
+        Sorted (canonical keys, degeneracies) arrays (see config_store.to_run).
+    """
+    items, N, n_planes, n = task
+    M = n_planes * N
+    W = n_words(M)
+    offset = (n_planes - 1) * N
+    keys, degeneracies = [], []
+    for coarse, degeneracy, start, stop in items:
+        occupied = 0
+        for s in range(n_planes - 1):
+            occupied |= coarse >> (s * N)
+        free = [i for i in range(N) if not (occupied >> i) & 1]  # bits above N are ignored
+        F = len(free)
+        local = subsets_table(0, F, n)[start:stop]
+        if local.ndim == 1:
+            local = local[:, None]
+
+        # Deposit the local subsets on the free sites of the last plane, then add the coarse planes
+        deposit = _deposit_luts(free, offset, W)
+        words = np.zeros((len(local), W), dtype=np.uint64)
+        for b in range(len(deposit)):
+            byte = ((local[:, b // 8] >> np.uint64(8 * (b % 8))) & np.uint64(0xFF)).astype(np.intp)
+            words |= deposit[b][byte]
+        words |= np.array([(coarse >> (64 * w)) & ((1 << 64) - 1) for w in range(W)],
+                          dtype=np.uint64)
+
+        if W == 1:
+            canon, counts = np.unique(canonical_block(words[:, 0], _packed_luts(n_planes, N)),
+                                      return_counts=True)
+        else:
+            canon = canonical_block(words, _packed_luts(n_planes, N))
+            canon = canon[lex_order(canon)]
+            starts = run_starts(canon)
+            counts = np.diff(np.r_[starts, len(canon)])
+            canon = canon[starts]
+        keys.append(canon)
+        degeneracies.append(counts * degeneracy)
+
+    # Different coarse representatives lead to different orbits: the keys are disjoint
+    keys = np.concatenate(keys)
+    degeneracies = np.concatenate(degeneracies).astype(np.uint16)
+    order = np.argsort(keys) if W == 1 else lex_order(keys)
+    return keys[order], degeneracies[order]
+
+def _tasks(coarse_configs, N, composition, block_size=BLOCK_SIZE):
+    """
+    Splits the sweep into work units of about block_size configurations: the placements
+    of a coarse representative are split if there are more, and the placements of
+    several representatives are grouped if there are fewer.
+
+    Yields:
+        Lists of (coarse_key, degeneracy, start, stop) items (see _worker).
+    """
+    n = composition[-2]
+    n_placements = comb(composition[-2] + composition[-1], n)
+    items, size = [], 0
+    for coarse, degeneracy in coarse_configs.items():
+        for start in range(0, n_placements, block_size):
+            stop = min(start + block_size, n_placements)
+            items.append((coarse, degeneracy, start, stop))
+            size += stop - start
+            if size >= block_size:
+                yield items
+                items, size = [], 0
+    if items:
+        yield items
+
+def enumerate_planes(N, composition, permutations, coarse_configs, pool=None):
+    """
+    Enumerate the unique configurations of a composition with at least three species
+    from those of the coarser composition (see the module docstring).
+
+    Parameters:
+        N:              Number of sites.
+        composition:    Number of sites of every species, (n_0, ..., n_{c-1}).
+        permutations:   List of symmetry permutations (as lists/tuples of indices).
+        coarse_configs: Unique configurations of (n_0, ..., n_{c-3}, n_{c-2} + n_{c-1}),
+                        {packed key: degeneracy}.
+        pool:           See config_store.run_tasks.
+
+    Returns:
+        UniqueConfigs mapping {canonical packed key (int): degeneracy (int)}.
+    """
+    perm_tuples = [tuple(p) for p in permutations]
+    n_planes = len(composition) - 1
+    tasks = [(items, N, n_planes, composition[-2])
+             for items in _tasks(coarse_configs, N, composition)]
+    M = n_planes * N
+    return run_tasks(_worker, tasks, M, perm_tuples, pool)
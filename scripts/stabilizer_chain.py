@@ -0,0 +1,63 @@
+"""
+Canonical form of configurations by walking a stabilizer chain of the group,
+for groups too large to try every element (e.g. point groups extended by the
+translations of a periodic supercell, with thousands of elements).
+
+This module:
+- Builds a stabilizer chain G = G_1 > G_2 > ... > G_m > 1 for the base points
+  b_1 > b_2 > ... > b_m, taken from the highest site down: G_i fixes every site
+  above b_i, and G_{i+1} is the stabilizer of b_i in G_i. Each level keeps one coset
+  representative of G_{i+1} per image of b_i (the transversal); together, the
+  transversals are a strong generating set of the group.
+- Finds the minimal image of a configuration level by level. All elements of
+  a coset of G_{i+1} agree on every site above b_{i+1}, so only the cosets whose
+  images are minimal there are extended. Candidates are kept as images (bitvectors)
+  rather than group elements, so that cosets leading to the same image are merged.
+
+The work per configuration is the sum of the transversal sizes (times the number of
+tied candidates), instead of the group order, which is their product.
+"""
+
+from bitset import site_masks, image
+
+def stabilizer_chain(perm_tuples, N):
+    """
+    Builds the stabilizer chain of a group given by its full permutation table.
+
+    Parameters:
+        perm_tuples: List of all group permutations (tuples mapping output to input positions).
+        N:           Number of sites.
+
+    Returns:
+        List of levels (shift, masks), one per base point, from the highest base point down:
+        masks holds the site masks (see bitset.site_masks) of one transversal
+        element per image of the base point, and shift is the next base point + 1
+        (0 for the last level): the images of a coset agree on the bits from shift up.
+    """
+    group = list(set(perm_tuples))
+    points = []
+    transversals = []
+    for b in range(N - 1, -1, -1):
+        if len(group) == 1:
+            break
+        reps = {}
+        for p in group:
+            reps.setdefault(p[b], p)
+        if len(reps) > 1:
+            points.append(b)
+            transversals.append(list(reps.values()))
+            group = [p for p in group if p[b] == b]
+    shifts = [b + 1 for b in points[1:]] + [0]
+    return [(shift, site_masks(reps, N)) for shift, reps in zip(shifts, transversals)]
+
+def minimal_image(bitvec, chain):
+    """
+    Computes the canonical (minimum) bitvector of `bitvec` under the group of `chain`
+    (see stabilizer_chain), same result as fast_enum._canonical_int.
+    """
+    candidates = {bitvec}
+    for shift, masks in chain:
+        images = {image(c, m) for c in candidates for m in masks}
+        best = min(img >> shift for img in images)
+        candidates = {img for img in images if img >> shift == best}
+    return min(candidates)
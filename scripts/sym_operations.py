@@ -41,7 +41,7 @@ def apply_symmetry_operation(operation, coordinates):
     return np.dot(coordinates, operation.T)
 
 
-### Symmmetry group ### (Only D4h is currently implemented) 
+### Symmmetry groups ###
 
 def D4h_symmetry_operations():
     """Returns dict {name: 3x3 matrix} for D4h symmetry operations."""
@@ -63,6 +63,45 @@ def D4h_symmetry_operations():
         "sigma_d(xy)": reflection_matrix([1,-1,0]),
         "sigma_d'(-xy)": reflection_matrix([1,1,0])
     }
-    
-# Insert more symmetry groups here as needed
+
+### Point groups from generators ###
+# A point group is given by a few generating operations (principal axis along z,
+# three-fold axes along the cube diagonals). The other elements are not built as
+# matrices: they follow by closure on the site permutations of the generators
+# (see define_permutations.permutation_group).
+
+POINT_GROUPS = {
+    'C1':  (),
+    'Ci':  ('i',),
+    'C2h': ('C2', 'i'),
+    'C2v': ('C2', 'sigma_v(x)'),
+    'D2h': ('C2', "C2'(x)", 'i'),
+    'C4h': ('C4', 'i'),
+    'C4v': ('C4', 'sigma_v(x)'),
+    'D4':  ('C4', "C2'(x)"),
+    'D2d': ('S4', "C2'(x)"),
+    'D4h': ('C4', "C2'(x)", 'i'),
+    'D3d': ('C3(xyz)', "C2'(x-y)", 'i'),
+    'T':   ('C2', 'C3(xyz)'),
+    'Th':  ('C2', 'C3(xyz)', 'i'),
+    'Td':  ('S4', 'C3(xyz)'),
+    'O':   ('C4', 'C3(xyz)'),
+    'Oh':  ('C4', 'C3(xyz)', 'i'),
+}
+
+def group_generators(group):
+    """Returns dict {name: 3x3 matrix} of the generating operations of a point group."""
+    if group not in POINT_GROUPS:
+        raise ValueError(f"Unknown point group '{group}', choose from {', '.join(POINT_GROUPS)}")
+    operations = {
+        'C4': rotation_matrix([0,0,1], 90),
+        'C2': rotation_matrix([0,0,1], 180),
+        "C2'(x)": rotation_matrix([1,0,0], 180),
+        "C2'(x-y)": rotation_matrix([1,-1,0], 180),
+        'C3(xyz)': rotation_matrix([1,1,1], 120),
+        'i': inversion_matrix(),
+        'S4': improper_rotation_matrix([0,0,1], 90),
+        'sigma_v(x)': reflection_matrix([0,1,0]),
+    }
+    return {name: operations[name] for name in POINT_GROUPS[group]}
     
@@ -0,0 +1,88 @@
+"""
+Script for the NumPy-vectorized enumeration of unique Br/I configurations
+(up to symmetry), the batched counterpart of fast_enum.
+
+This module:
+- Generates all combinations as blocks of uint64 bitvectors, by OR-ing a table of
+  subsets of the low sites with a table of subsets of the high sites.
+- Applies each permutation to a whole block through precomputed per-byte lookup
+  tables: the image of a bitvector is the OR of one table lookup per byte.
+- Takes the canonical form as the element-wise minimum over the group (np.minimum)
+  and counts degeneracies with np.unique.
+- Divides the blocks across multiple CPU cores.
+- Beyond 64 sites, works the same way on blocks of multi-word rows (see bitset.py).
+"""
+
+from math import comb
+import numpy as np
+from bitset import subsets_table, canonical_block, lex_order, run_starts
+from config_store import run_tasks, worker_luts
+
+LOW_BITS = 16          # sites covered by the low subset table
+BLOCK_SIZE = 1 << 18   # target number of combinations per block
+
+
+def _block_tasks(N, k, block_size=BLOCK_SIZE):
+    """
+    Splits the N choose k combinations into blocks.
+
+    Yields:
+        (i, h_start, h_stop): combinations with i sites among the low LOW_BITS sites,
+        and the rows [h_start, h_stop) of the table of high-site subsets.
+    """
+    s = min(N, LOW_BITS)
+    for i in range(max(0, k - (N - s)), min(k, s) + 1):
+        n_low = comb(s, i)
+        n_high = comb(N - s, k - i)
+        step = max(1, block_size // n_low)
+        for h_start in range(0, n_high, step):
+            yield (i, h_start, min(h_start + step, n_high))
+
+def _worker(task):
+    """
+    Worker function for parallel vectorized enumeration.
+
+    Parameters:
+        task: (i, h_start, h_stop, k, N), see _block_tasks.
+
+    Returns:
+        (canonical bitvectors, counts) as sorted uint64 / uint16 arrays
+        (bitvectors as rows of words if N > 64).
+    """
+    i, h_start, h_stop, k, N = task
+    s = min(N, LOW_BITS)
+    low = subsets_table(0, s, i)
+    high = subsets_table(s, N, k - i)[h_start:h_stop]
+    if N > 64:
+        words = np.repeat(high, len(low), axis=0)
+        words[:, 0] |= np.tile(low, len(high))
+        canon = canonical_block(words, worker_luts())
+        canon = canon[lex_order(canon)]
+        starts = run_starts(canon)
+        counts = np.diff(np.r_[starts, len(canon)])
+        return canon[starts], counts.astype(np.uint16)
+    bits = (high[:, None] | low[None, :]).ravel()
+    keys, counts = np.unique(canonical_block(bits, worker_luts()), return_counts=True)
+    return keys, counts.astype(np.uint16)
+
+def enumerate_numpy(N, k, permutations, pool=None, out_path=None, checkpoint=None):
+    """
+    Enumerate all unique (up to symmetry) Br/I configurations for k I on N sites
+    with the NumPy-batched kernel.
+
+    Parameters:
+        N:            Number of sites.
+        k:            Number of I atoms.
+        permutations: List of symmetry permutations (as lists/tuples of indices).
+        pool, out_path, checkpoint: See config_store.run_tasks.
+
+    Returns:
+        UniqueConfigs mapping {canonical_bitvector (int): degeneracy (int)}, identical
+        to the one built by fast_enum.enumerate_unique.
+    """
+    perm_tuples = [tuple(p) for p in permutations]
+
+    tasks = [(i, h_start, h_stop, k, N) for i, h_start, h_stop in _block_tasks(N, k)]
+    # Merge the per-block counts as the blocks complete
+    return run_tasks(_worker, tasks, N, perm_tuples, pool, out_path,
+                     checkpoint)
@@ -1,5 +1,14 @@
 import matplotlib.pyplot as plt
+import multiprocessing as mp
 import os
+from io import StringIO
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+from mpl_toolkits.mplot3d import proj3d
+
+SVG_CHUNK = 256  # structures written per task of the process pool
+
+COLOR_MAP = {'Br': 'red', 'I': 'blue'}
 
 def get_connections(num_atoms):
     """Return a list of (start, end) tuples defining connections between atoms."""
@@ -61,50 +70,130 @@ def get_connections(num_atoms):
             (7, 6), (7, 8),
         ]
             
-def save_structures_as_svgs(structures, outdir, prefix='', elevation=20, azimuth=80):
+def svg_template(coordinates, elevation=20, azimuth=80):
+    """
+    Renders the fixed part of a structure once: bonds and legend are drawn by matplotlib
+    into an SVG, and the atoms are projected to their positions on the page.
+
+    Parameters:
+        coordinates: (x, y, z) coordinates of all atoms.
+        elevation, azimuth: Camera angles, as in save_structures_as_svgs.
+
+    Returns:
+        (head, atoms, title): head is the SVG document without its closing tag,
+        atoms holds one '<circle .../>' string per atom (back to front) as
+        (atom index, string with a %s for the color) pairs, and title a '<text>'
+        string with a %s for the title.
+    """
+    fig = plt.figure(figsize=(5, 5), dpi=72)  # 72 dpi: display units are SVG points
+    ax = fig.add_subplot(111, projection='3d')
+
+    # Draw connections
+    for start, end in get_connections(len(coordinates)):
+        x_values = [coordinates[start][0], coordinates[end][0]]
+        y_values = [coordinates[start][1], coordinates[end][1]]
+        z_values = [coordinates[start][2], coordinates[end][2]]
+        ax.plot(x_values, y_values, z_values, color='grey', linewidth=0.8)
+
+    ax.set_box_aspect([1, 1, 1])
+    max_range = max([max(coordinates, key=lambda item: abs(item[i]))[i] for i in range(3)])
+    ax.set_xlim(-max_range, max_range)
+    ax.set_ylim(-max_range, max_range)
+    ax.set_zlim(-max_range, max_range)
+    ax.set_title(' ')
+    ax.view_init(elev=elevation, azim=azimuth)
+    ax.set_axis_off()  # Hide all axes
+
+    handles = [
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='red', markersize=10, label='I'),
+        plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='blue', markersize=10, label='Br')
+    ]
+    fig.legend(handles=handles, title='Elements', loc='upper right')
+    fig.canvas.draw()
+
+    # Project the atoms once; a larger projected z is further from the camera
+    xs, ys, zs = proj3d.proj_transform(*zip(*coordinates), ax.get_proj())
+    points = ax.transData.transform(list(zip(xs, ys)))
+    height = fig.bbox.height
+    radius = 50 ** 0.5 / 2  # same marker area as ax.scatter(..., s=50)
+    order = sorted(range(len(coordinates)), key=lambda i: -zs[i])
+    atoms = [(i, f'<circle cx="{points[i][0]:.2f}" cy="{height - points[i][1]:.2f}" '
+                 f'r="{radius:.2f}" style="fill: %s; stroke: %s"/>\n') for i in order]
+
+    bbox = ax.title.get_window_extent()
+    title = (f'<text x="{(bbox.x0 + bbox.x1) / 2:.2f}" y="{height - bbox.y0 - 3:.2f}" '
+             f'style="font: 12px \'DejaVu Sans\', sans-serif; text-anchor: middle">%s</text>\n')
+
+    svg = _svg_string(fig)
+    plt.close(fig)
+    head = svg[:svg.rindex('</svg>')]
+    return head, atoms, title
+
+def _svg_string(fig):
+    """SVG document of a matplotlib figure, as a string."""
+    buffer = StringIO()
+    fig.savefig(buffer, format='svg')
+    return buffer.getvalue()
+
+def _write_svgs(task):
+    """
+    Worker function: fills the template with the atom colors and title of each
+    structure, and writes the SVG files.
+
+    Parameters:
+        task: (template, [(filepath, symbols, title), ...]), template from svg_template.
+    """
+    (head, atoms, title_fmt), items = task
+    for filepath, symbols, title in items:
+        body = ''.join(fmt % (COLOR_MAP[symbols[i]], COLOR_MAP[symbols[i]]) for i, fmt in atoms)
+        with open(filepath, 'w') as f:
+            f.write(head + body + title_fmt % escape(title) + '</svg>\n')
+    return len(items)
+
+def _svg_tasks(structures, outdir, prefix, elevation, azimuth):
+    """
+    Splits the structures into chunks of SVG_CHUNK sharing the same geometry,
+    each with its template (built once per geometry).
+    """
+    templates = {}
+    structures = iter(enumerate(structures))
+    while True:
+        chunk = list(islice(structures, SVG_CHUNK))
+        if not chunk:
+            return
+        groups = {}
+        for idx, (coordinates, symbols, title) in chunk:
+            key = tuple(map(tuple, coordinates))
+            if key not in templates:
+                templates[key] = svg_template(coordinates, elevation, azimuth)
+            filepath = os.path.join(outdir, f"{prefix}_config{idx+1}.svg")
+            groups.setdefault(key, []).append((filepath, symbols, title))
+        for key, items in groups.items():
+            yield templates[key], items
+
+def save_structures_as_svgs(structures, outdir, prefix='', elevation=20, azimuth=80,
+                            processes=None):
     """
     Save each molecular structure as a separate SVG image.
     Connections are added (no labels, no axes shown).
+
+    The geometry is rendered once (see svg_template): only the atom colors and the title
+    change between structures, so each SVG is written from the template, in parallel
+    over a process pool. `structures` can be any iterable (e.g. a generator), it is
+    consumed in chunks of SVG_CHUNK.
     """
     if not os.path.exists(outdir):
         os.makedirs(outdir)
 
-    color_map = {'Br': 'red', 'I': 'blue'}
-
-    for idx, (coordinates, symbols, title) in enumerate(structures):
-        fig = plt.figure(figsize=(5, 5))
-        ax = fig.add_subplot(111, projection='3d')
-
-        # Plot atoms
-        for i, c in enumerate(coordinates):
-            color = color_map[symbols[i]]
-            ax.scatter(*c, color=color, label=symbols[i], s=50)
-
-        # Draw connections
-        connections = get_connections(len(coordinates))
-        for start, end in connections:
-            x_values = [coordinates[start][0], coordinates[end][0]]
-            y_values = [coordinates[start][1], coordinates[end][1]]
-            z_values = [coordinates[start][2], coordinates[end][2]]
-            ax.plot(x_values, y_values, z_values, color='grey', linewidth=0.8)
-
-        ax.set_box_aspect([1, 1, 1])
-        max_range = max([max(coordinates, key=lambda item: abs(item[i]))[i] for i in range(3)])
-        ax.set_xlim(-max_range, max_range)
-        ax.set_ylim(-max_range, max_range)
-        ax.set_zlim(-max_range, max_range)
-        ax.set_title(title)
-        ax.view_init(elev=elevation, azim=azimuth)
-        ax.set_axis_off()  # Hide all axes
-
-        handles = [
-            plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='red', markersize=10, label='I'),
-            plt.Line2D([0], [0], marker='o', color='w', markerfacecolor='blue', markersize=10, label='Br')
-        ]
-        fig.legend(handles=handles, title='Elements', loc='upper right')
-
-        filename = f"{prefix}_config{idx+1}.svg"
-        filepath = os.path.join(outdir, filename)
-        plt.savefig(filepath, format='svg')
-        plt.close(fig)
-        
+    tasks = _svg_tasks(structures, outdir, prefix, elevation, azimuth)
+    first = next(tasks, None)
+    if first is None:
+        return
+    if len(first[1]) < SVG_CHUNK:  # a single small chunk, not worth a pool
+        _write_svgs(first)
+        for task in tasks:
+            _write_svgs(task)
+        return
+    with mp.Pool(processes) as pool:
+        for _ in pool.imap_unordered(_write_svgs, chain([first], tasks)):
+            pass
@@ -13,8 +13,8 @@ import sym_operations as sym
 import define_permutations as pr
 import visualize_streamlit_plotly as vis
 import time
-from fast_enum import enumerate_unique
-from burnside import burnside_count
+from fast_enum import EnumerationEngine
+from config_store import UniqueConfigs, ResultCache
 
 # --- Coordination spheres ---
 coordinates_first_sphere = [
@@ -42,29 +42,64 @@ coordinates_reduced_sphere = [
     [1, 0, -1], [0, -1, -1], [-1, 0, -1], [0, 1, -1],
 ]
 
+PAGE_SIZE = 20  # structures rendered per page, to avoid browser overload
+
+SPHERES = {1: coordinates_first_sphere, 2: coordinates_second_sphere, 3: coordinates_reduced_sphere}
+
 # --- Utility ---
-def get_streamlit_configs(n_br, coordinates, enum_max=30_000_000, sphere=1):
+@st.cache_resource
+def get_engine(sphere, group='D4h'):
+    """
+    Enumeration engine for a coordination sphere and point group, built once per server process:
+    permutations and worker pool are reused across button presses and sessions,
+    and results are kept in the on-disk result cache across server restarts.
+    """
+    perms = pr.permutation_group(group, SPHERES[sphere])
+    return EnumerationEngine(perms, sphere=sphere, cache=ResultCache())
+
+def get_streamlit_configs(n_br, enum_max=30_000_000, sphere=1, n_samples=0, group='D4h'):
     """
     Compute unique Br/I configurations (or counts) for a coordination sphere.
+    Above `enum_max`, up to `n_samples` unique configurations are drawn uniformly at random.
 
     Returns
     -------
     tuple: (uniq_dict, n_unique, n_total, can_visualize)
-        uniq_dict: {config_int: degeneracy} or None
+        uniq_dict: {config_int: degeneracy}, or the random draws (None if none)
         n_unique: int, number of unique configurations
         n_total: int, total configurations before symmetry
         can_visualize: bool, True if enumeration (not Burnside) is used
     """
-    ops = sym.D4h_symmetry_operations()
-    perms = list(pr.find_all_permutations(ops, coordinates).values())
-    n_sites = len(coordinates)
-    uniq_dict, n_total = enumerate_unique(n_sites, n_br, perms, enum_max)
+    engine = get_engine(sphere, group)
+    uniq_dict, n_total = engine.enumerate(n_br, enum_max)
     if uniq_dict is None:  # Burnside Tier
-        n_unique = burnside_count(n_sites, n_br, sphere=sphere, perms=perms)
-        return None, n_unique, n_total, False  # Not visualizable
+        n_unique = engine.count(n_br)
+        samples = dict(engine.sample(n_br, n_samples)) or None
+        return samples, n_unique, n_total, False  # Not fully visualizable
     n_unique = len(uniq_dict)
     return uniq_dict, n_unique, n_total, True
 
+def page_structures(uniq_dict, coordinates, page):
+    """
+    Build the (coordinates, symbols, title) structures of one page of configurations.
+    Only the configurations of that page are read (and later turned into figures).
+    """
+    start = page * PAGE_SIZE
+    if isinstance(uniq_dict, UniqueConfigs):
+        shown = uniq_dict.slice(start, start + PAGE_SIZE)
+    else:
+        shown = list(uniq_dict.items())[start:start + PAGE_SIZE]
+    structures = []
+    for idx, (config_int, degeneracy) in enumerate(shown, start):
+        bits = [(config_int >> i) & 1 for i in range(len(coordinates))]
+        symbols = ['Br'] * (len(coordinates) + 1)
+        for i, b in enumerate(bits):
+            symbols[i + 1] = 'I' if b else 'Br'
+        title = f"Config {idx+1}: Degeneracy {degeneracy}"
+        full_coords = [[0, 0, 0]] + coordinates
+        structures.append((full_coords, symbols, title))
+    return structures
+
 # --- Streamlit UI ---
 st.title("Crystal Configuration Generator")
 
@@ -75,50 +110,71 @@ sphere = st.selectbox(
                           "2nd (46 atoms)" if x == 2 else
                           "Reduced (8 atoms)"
 )
+group = st.selectbox(
+    "Point Group", list(sym.POINT_GROUPS), index=list(sym.POINT_GROUPS).index('D4h')
+)
 enum_max = st.number_input(
     "Max configs for enumeration (otherwise Burnside, no visualization)", value=30_000_000, min_value=1000
 )
 if sphere == 1:
-    num_i = st.slider('Number of I Atoms', 0, 7, 1)
+    num_i = st.slider('Number of I Atoms', 0, 14, 1)
     coordinates = coordinates_first_sphere
 elif sphere == 2:
-    num_i = st.slider('Number of I Atoms', 0, 28, 1)
+    num_i = st.slider('Number of I Atoms', 0, 46, 1)
     coordinates = coordinates_second_sphere
 else:
-    num_i = st.slider('Number of I Atoms', 0, 4, 1)
+    num_i = st.slider('Number of I Atoms', 0, 8, 1)
     coordinates = coordinates_reduced_sphere
 
+n_samples = st.number_input(
+    "Random unique configurations to show when enumeration is too large", value=20, min_value=0
+)
 show_axis = st.checkbox('Show Axis', value=True)
+# Results are kept in the session, so that changing page does not enumerate again
 if st.button('Generate Configurations'):
     start = time.time()
-    uniq_dict, n_unique, n_total, can_visualize = get_streamlit_configs(num_i, coordinates, enum_max, sphere=sphere)
-    elapsed = time.time() - start
+    try:
+        uniq_dict, n_unique, n_total, can_visualize = get_streamlit_configs(
+            num_i, enum_max, sphere=sphere, n_samples=n_samples, group=group
+        )
+    except ValueError as e:  # sites not symmetric under the chosen group
+        st.error(str(e))
+        st.stop()
+    st.session_state.result = dict(
+        uniq_dict=uniq_dict, n_unique=n_unique, n_total=n_total, can_visualize=can_visualize,
+        elapsed=time.time() - start, num_i=num_i, coordinates=coordinates,
+        sphere=sphere, group=group
+    )
+    st.session_state.page = 1
 
-    st.markdown(f"**Number of I atoms:** {num_i}")
-    st.markdown(f"**Number of Br atoms:** {len(coordinates) - num_i}")
-    st.markdown(f"**Total number of configurations:** {n_total:,}")
-    st.markdown(f"**Total number of unique configurations:** {n_unique:,}")
-    st.markdown(f"**Time taken:** {elapsed:.2f} seconds")
+result = st.session_state.get('result')
+if result is not None:
+    uniq_dict = result['uniq_dict']
+    coordinates = result['coordinates']
 
-    if not can_visualize:
-        st.warning("Too many configurations to visualize. Only statistics are shown.")
-    else:
-        structures = []
-        for idx, (config_int, degeneracy) in enumerate(uniq_dict.items()):
-            bits = [(config_int >> i) & 1 for i in range(len(coordinates))]
-            symbols = ['Br'] * (len(coordinates) + 1)
-            for i, b in enumerate(bits):
-                symbols[i + 1] = 'I' if b else 'Br'
-            title = f"Config {idx+1}: Degeneracy {degeneracy}"
-            full_coords = [[0, 0, 0]] + coordinates
-            structures.append((full_coords, symbols, title))
+    st.markdown(f"**Number of I atoms:** {result['num_i']}")
+    st.markdown(f"**Number of Br atoms:** {len(coordinates) - result['num_i']}")
+    st.markdown(f"**Total number of configurations:** {result['n_total']:,}")
+    st.markdown(f"**Total number of unique configurations:** {result['n_unique']:,}")
+    st.markdown(f"**Time taken:** {result['elapsed']:.2f} seconds")
 
+    if not result['can_visualize']:
+        st.warning("Too many configurations to visualize. Only statistics are shown.")
+        histogram = get_engine(result['sphere'], result['group']).degeneracies(result['num_i'])
+        st.markdown("**Unique configurations per degeneracy:**")
+        st.table({"Degeneracy": list(histogram.keys()),
+                  "Unique configurations": [f"{n:,}" for n in histogram.values()]})
+        if uniq_dict:
+            st.info(f"Showing {len(uniq_dict)} unique configurations drawn uniformly at random.")
+    if uniq_dict:
+        # Figures are built for the selected page only
+        n_pages = -(-len(uniq_dict) // PAGE_SIZE)
+        page = st.number_input(f"Page (of {n_pages:,})", min_value=1, max_value=n_pages, key='page')
+        structures = page_structures(uniq_dict, coordinates, page - 1)
         figures = vis.plot_multiple_structures(
             structures, elevation=1.5, azimuth=1.5, show_axis=show_axis
         )
-        # Limit to max 100 plots to avoid browser overload!
-        for i, fig in enumerate(figures[:100]):
+        for fig in figures:
             st.plotly_chart(fig, use_container_width=True)
-        if len(figures) > 100:
-            st.info(f"Only first 100 structures shown out of {len(figures)}.")
-
+        first = (page - 1) * PAGE_SIZE + 1
+        st.info(f"Structures {first:,}-{first + len(structures) - 1:,} shown out of {len(uniq_dict):,}.")
@@ -50,21 +50,19 @@ def plot_molecular_structure(coordinates, symbols, title, elevation=1.5, azimuth
     plotly.graph_objs._figure.Figure
         Interactive 3D plot.
     """
-    fig = go.Figure()
-
     # Define a color map based on the labels
     color_map = {'Br': 'red', 'I': 'blue'}
 
-    # Add scatter plot for atoms
-    for i, c in enumerate(coordinates):
-        color = color_map[symbols[i]]
-        fig.add_trace(go.Scatter3d(
-            x=[c[0]], y=[c[1]], z=[c[2]],
-            mode='markers+text',
-            marker=dict(size=10, color=color),
-            text=f'{symbols[i]} {i}',
-            textposition='top center'
-        ))
+    # Add all atoms as one scatter trace, colored per point
+    fig = go.Figure(go.Scatter3d(
+        x=[c[0] for c in coordinates],
+        y=[c[1] for c in coordinates],
+        z=[c[2] for c in coordinates],
+        mode='markers+text',
+        marker=dict(size=10, color=[color_map[s] for s in symbols]),
+        text=[f'{s} {i}' for i, s in enumerate(symbols)],
+        textposition='top center'
+    ))
 
     # Calculate aspect ratio based on the coordinates
     aspect_ratio = calculate_aspect_ratio(coordinates)
@@ -90,6 +88,132 @@ def plot_molecular_structure(coordinates, symbols, title, elevation=1.5, azimuth
 
 
 
+# Bonds drawn for each coordination sphere
+def get_connections(n_atoms):
+    """
+    Bonds of the structure with `n_atoms` atoms (central atom included).
+
+    Parameters
+    ----------
+    n_atoms : int
+        15 for the first sphere, 47 for the second, otherwise the reduced sphere.
+
+    Returns
+    -------
+    list of tuple
+        Pairs of atom indices to connect.
+    """
+    # Define connections as pairs of point indices (0-based index)
+    if n_atoms == 15:
+        return [
+            (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8), (0, 9),
+            (1, 2), (1, 3), (1, 4), (1, 5),
+            (2, 3), (2, 5),
+            (4, 3), (4, 5),
+            (6, 7), (6, 9),
+            (8, 7), (8, 9),
+            (6, 10), (7, 10), (8, 10), (9, 10),
+            (0, 11), (0, 12), (0, 13), (0, 14)
+        ]
+    elif n_atoms == 47:
+        return [
+            (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8), (0, 9),
+            (1, 2), (1, 3), (1, 4), (1, 5),
+            (2, 3), (2, 5), (2, 11), (2, 12), (2, 14), (2, 15),
+            (3, 4), (3, 38), (3, 39), (3, 40), (3, 41),
+            (4, 5), (4, 29), (4, 30), (4, 32), (4, 33),
+            (5, 20), (5, 21), (5, 22), (5, 23),
+            (6, 7), (6, 9), (6, 10), (6, 11), (6, 17), (6, 18), (6, 19),
+            (7, 8), (7, 10), (7, 38), (7, 43), (7, 44), (7, 46),
+            (8, 9), (8, 10), (8, 29), (8, 35), (8, 36), (8, 37),
+            (9, 10), (9, 20), (9, 25), (9, 26), (9, 28),
+            (11, 13), (11, 14), (11, 15), (11, 16), (11, 17), (11, 18),
+            (12, 13), (12, 14), (12, 15),
+            (13, 14), (13, 15), 
+            (16, 17), (16, 18), (16, 19), 
+            (17, 19),
+            (18, 19), 
+            (20, 22), (20, 23), (20, 24), (20, 25), (20, 26), (20, 27),
+            (21, 22), (21, 23), (21, 24), 
+            (22, 24), 
+            (23, 24),
+            (25, 27), (25, 28), 
+            (26, 20), (26, 27), (26, 28),
+            (27, 28),
+            (29, 31), (29, 32), (29, 33), (29, 34), (29, 35), (29, 36),
+            (30, 31), (30, 32), (30, 33), 
+            (31, 32), (31, 33),
+            (34, 35), (34, 36), (34, 37), 
+            (35, 37),
+            (36, 34), (36, 37), 
+            (38, 40), (38, 41), (38, 42), (38, 43), (38, 44), (38, 45),
+            (39, 40), (39, 41), (39, 42), 
+            (40, 42),
+            (41, 42), 
+            (43, 45), (43, 46),
+            (44, 45), (44, 46), (45, 46),
+        ]
+    else:
+        return [
+            (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8),
+            (1, 2), (1, 4),
+            (3, 2), (3, 4),
+            (5, 6), (5, 8),
+            (7, 6), (7, 8),
+            
+        ]
+
+
+def structure_traces(coordinates, symbols, marker_size=8):
+    """
+    Build the two traces of a structure: all atoms as one marker trace with per-point
+    colors, and all bonds as one line trace whose segments are separated by None.
+
+    Parameters
+    ----------
+    coordinates : list of list[float]
+        (x, y, z) coordinates of all atoms.
+    symbols : list[str]
+        List of atom types ("I", "Br", etc.), must match coordinates.
+    marker_size : int
+        Size of the atom markers.
+
+    Returns
+    -------
+    list
+        [atoms, bonds] Scatter3d traces.
+    """
+    # Define a color map based on the labels
+    color_map = {'Br': 'red', 'I': 'blue'}
+
+    atoms = go.Scatter3d(
+        x=[c[0] for c in coordinates],
+        y=[c[1] for c in coordinates],
+        z=[c[2] for c in coordinates],
+        mode='markers',
+        marker=dict(size=marker_size, color=[color_map[s] for s in symbols]),
+        text=[f'{s} {i}' for i, s in enumerate(symbols)],
+        hoverinfo='text',
+        showlegend=False
+    )
+
+    # One polyline for all bonds: None breaks the line between two bonds
+    x_values, y_values, z_values = [], [], []
+    for start, end in get_connections(len(coordinates)):
+        if start < len(coordinates) and end < len(coordinates):  # Check if indices are valid
+            x_values += [coordinates[start][0], coordinates[end][0], None]
+            y_values += [coordinates[start][1], coordinates[end][1], None]
+            z_values += [coordinates[start][2], coordinates[end][2], None]
+    bonds = go.Scatter3d(
+        x=x_values, y=y_values, z=z_values,
+        mode='lines',
+        line=dict(color='gray', width=2),
+        hoverinfo='skip',
+        showlegend=False
+    )
+    return [atoms, bonds]
+
+
 # Define a function to plot multiple molecular structures using Plotly (sequentially in Streamlit)
 def plot_multiple_structures(structures, elevation=1.5, azimuth=1.5, show_axis=False):
     """
@@ -109,96 +233,11 @@ def plot_multiple_structures(structures, elevation=1.5, azimuth=1.5, show_axis=F
     list
         List of plotly Figure objects (one per structure).
     """
-    figures = [] 
+    figures = []
 
     # Loop through each structure and add it to the figure
     for idx, (coordinates, symbols, title) in enumerate(structures):
-        fig = go.Figure()
-
-        # Define a color map based on the labels
-        color_map = {'Br': 'red', 'I': 'blue'}
-
-        # Add atoms as scatter plot points
-        for i, c in enumerate(coordinates):
-            color = color_map[symbols[i]]
-            fig.add_trace(go.Scatter3d(
-                x=[c[0]], y=[c[1]], z=[c[2]],
-                mode='markers',
-                marker=dict(size=8, color=color),
-                name=f'{symbols[i]} {i}'
-            ))
-
-        # Define connections as pairs of point indices (0-based index)
-        if len(coordinates) == 15:
-            connections = [
-                (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8), (0, 9),
-                (1, 2), (1, 3), (1, 4), (1, 5),
-                (2, 3), (2, 5),
-                (4, 3), (4, 5),
-                (6, 7), (6, 9),
-                (8, 7), (8, 9),
-                (6, 10), (7, 10), (8, 10), (9, 10),
-                (0, 11), (0, 12), (0, 13), (0, 14)
-            ]
-        elif len(coordinates) == 47:
-            connections = [
-                (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8), (0, 9),
-                (1, 2), (1, 3), (1, 4), (1, 5),
-                (2, 3), (2, 5), (2, 11), (2, 12), (2, 14), (2, 15),
-                (3, 4), (3, 38), (3, 39), (3, 40), (3, 41),
-                (4, 5), (4, 29), (4, 30), (4, 32), (4, 33),
-                (5, 20), (5, 21), (5, 22), (5, 23),
-                (6, 7), (6, 9), (6, 10), (6, 11), (6, 17), (6, 18), (6, 19),
-                (7, 8), (7, 10), (7, 38), (7, 43), (7, 44), (7, 46),
-                (8, 9), (8, 10), (8, 29), (8, 35), (8, 36), (8, 37),
-                (9, 10), (9, 20), (9, 25), (9, 26), (9, 28),
-                (11, 13), (11, 14), (11, 15), (11, 16), (11, 17), (11, 18),
-                (12, 13), (12, 14), (12, 15),
-                (13, 14), (13, 15), 
-                (16, 17), (16, 18), (16, 19), 
-                (17, 19),
-                (18, 19), 
-                (20, 22), (20, 23), (20, 24), (20, 25), (20, 26), (20, 27),
-                (21, 22), (21, 23), (21, 24), 
-                (22, 24), 
-                (23, 24),
-                (25, 27), (25, 28), 
-                (26, 20), (26, 27), (26, 28),
-                (27, 28),
-                (29, 31), (29, 32), (29, 33), (29, 34), (29, 35), (29, 36),
-                (30, 31), (30, 32), (30, 33), 
-                (31, 32), (31, 33),
-                (34, 35), (34, 36), (34, 37), 
-                (35, 37),
-                (36, 34), (36, 37), 
-                (38, 40), (38, 41), (38, 42), (38, 43), (38, 44), (38, 45),
-                (39, 40), (39, 41), (39, 42), 
-                (40, 42),
-                (41, 42), 
-                (43, 45), (43, 46),
-                (44, 45), (44, 46), (45, 46),
-            ]
-        else:
-            connections = [
-                (0, 1), (0, 2), (0, 3), (0, 4), (0, 5), (0, 6), (0, 7), (0, 8),
-                (1, 2), (1, 4),
-                (3, 2), (3, 4),
-                (5, 6), (5, 8),
-                (7, 6), (7, 8),
-                
-            ]
-        # Add connections between specified points (check if indices are valid)
-        for start, end in connections:
-            if start < len(coordinates) and end < len(coordinates):  # Check if indices are valid
-                x_values = [coordinates[start][0], coordinates[end][0]]
-                y_values = [coordinates[start][1], coordinates[end][1]]
-                z_values = [coordinates[start][2], coordinates[end][2]]
-                fig.add_trace(go.Scatter3d(
-                    x=x_values, y=y_values, z=z_values,
-                    mode='lines',
-                    line=dict(color='gray', width=2),
-                    showlegend=False
-                ))
+        fig = go.Figure(data=structure_traces(coordinates, symbols))
 
         # Calculate aspect ratio based on the coordinates
         aspect_ratio = calculate_aspect_ratio(coordinates)